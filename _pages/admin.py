@@ -1,8 +1,78 @@
+import json
+
 import streamlit as st
+import pandas as pd
 from datetime import datetime, timezone, timedelta
 
+from psycopg2.extras import execute_values
+
+from utils.db import rerun_history, slow_queries, data_version, bump_data_version
+from utils import profiler
+from utils.tiering import rate_field, propose_tiers, DEFAULT_TIER_SIZES, DEFAULT_WEIGHTS, SG_COMPONENTS
+from _pages.research import load_research, refresh_research
+
+
+# The player universe changes rarely, so it is cached per data_versions stamp
+# (bumped by a trigger on players, see migrations/004) and shared by sessions.
+@st.cache_data(show_spinner=False, max_entries=2)
+def load_player_catalog(_cursor, version):
+    """Returns [(player_id, name)] sorted by name."""
+    _cursor.execute("SELECT player_id, name FROM players ORDER BY name")
+    return [(p["player_id"], p["name"]) for p in _cursor.fetchall()]
+
 
-def show(conn, cursor):
+def save_tiers(conn, cursor, tournament_id, existing, selected):
+    """
+    Write only the difference between the existing and selected
+    {(tier_number, player_id)} assignments, in one transaction.
+    Returns (added, removed) counts.
+    """
+    added = sorted(selected - existing)
+    removed = sorted(existing - selected)
+
+    if removed:
+        cursor.execute("""
+            DELETE FROM tournament_tiers t
+            USING unnest(%s::int[], %s::text[]) AS r(tier_number, player_id)
+            WHERE t.tournament_id = %s
+              AND t.tier_number = r.tier_number
+              AND t.player_id = r.player_id
+        """, ([t for t, _ in removed], [p for _, p in removed], tournament_id))
+
+    if added:
+        execute_values(cursor, """
+            INSERT INTO tournament_tiers (tournament_id, tier_number, player_id)
+            VALUES %s
+        """, [(tournament_id, t, p) for t, p in added])
+
+    conn.commit()
+    # The tiers_version trigger (migrations/005) moved the stamp; re-read it now
+    data_version.clear()
+    return len(added), len(removed)
+
+
+def tournament_field(api_key, tournament, catalog):
+    """
+    Players entered in `tournament` per its leaderboard, as [(player_id, name)]
+    from the player catalog. Falls back to the whole catalog when the
+    leaderboard is unavailable or empty.
+    """
+    from utils.leaderboard_api import get_live_leaderboard
+    try:
+        leaderboard = get_live_leaderboard(
+            api_key,
+            tournament.get("org_id") or "1",
+            tournament.get("tourn_id"),
+            tournament.get("year") or str(tournament["start_time"].year),
+        )
+    except Exception:
+        return catalog, False
+    entered = set(leaderboard["PlayerID"].astype(str)) if not leaderboard.empty else set()
+    field = [(pid, name) for pid, name in catalog if pid in entered]
+    return (field, True) if field else (catalog, False)
+
+
+def show(conn, cursor, api_key):
 
     st.subheader("Admin")
     st.write(" ")
@@ -13,7 +83,7 @@ def show(conn, cursor):
     st.markdown("**Set Up Tiers**")
 
     cursor.execute("""
-        SELECT tournament_id, name, start_time
+        SELECT tournament_id, name, start_time, org_id, tourn_id, year
         FROM tournaments
         ORDER BY start_time ASC
     """)
@@ -41,10 +111,9 @@ def show(conn, cursor):
     st.write("")
 
     # All players sorted by name
-    cursor.execute("SELECT player_id, name FROM players ORDER BY name")
-    all_players = cursor.fetchall()
-    name_to_id = {p["name"]: str(p["player_id"]) for p in all_players}
-    id_to_name = {str(p["player_id"]): p["name"] for p in all_players}
+    all_players = load_player_catalog(cursor, data_version(cursor, "players"))
+    name_to_id = {name: pid for pid, name in all_players}
+    id_to_name = {pid: name for pid, name in all_players}
     player_names = list(name_to_id.keys())
 
     # Existing tiers for selected tournament
@@ -59,32 +128,186 @@ def show(conn, cursor):
     existing_by_tier = {}
     for row in existing_rows:
         t = int(row["tier_number"])
-        pid = str(row["player_id"])
+        pid = row["player_id"]
         existing_by_tier.setdefault(t, []).append(pid)
 
+    # Auto-tiering: rank the field on research data and propose tiers. Applying
+    # a proposal only fills the pickers below; nothing is saved until Save Tiers.
+    with st.expander("Auto-tier from research"):
+        size_cols = st.columns(6)
+        sizes = [
+            size_cols[i].number_input(f"Tier {i + 1}", min_value=0, max_value=60, value=DEFAULT_TIER_SIZES[i], key=f"admin_auto_size_{i}")
+            for i in range(6)
+        ]
+        weight_cols = st.columns(len(SG_COMPONENTS))
+        weights = {
+            c: weight_cols[i].slider(f"SG {c} weight", 0.0, 2.0, DEFAULT_WEIGHTS[c], 0.1, key=f"admin_auto_weight_{c}")
+            for i, c in enumerate(SG_COMPONENTS)
+        }
+        use_field = st.checkbox("Only players in the tournament field (leaderboard API)", key="admin_auto_field")
+
+        if st.button("⚙️ Propose Tiers", key="admin_auto_propose"):
+            tournament = next(t for t in tournaments if t["tournament_id"] == selected_tid)
+            field, from_leaderboard = tournament_field(api_key, tournament, all_players) if use_field else (all_players, False)
+            if use_field and not from_leaderboard:
+                st.warning("Leaderboard field unavailable; proposing from all players.")
+            research, _ = load_research(cursor, data_version(cursor, "research"))
+            st.session_state["admin_auto_proposal"] = (selected_tid, propose_tiers(rate_field(field, research, weights), sizes))
+
+        proposal = st.session_state.get("admin_auto_proposal")
+        if proposal and proposal[0] == selected_tid:
+            proposed = proposal[1].dropna(subset=["tier_number"])
+            st.dataframe(
+                proposed[["tier_number", "rank", "name", "events", "rating"]],
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                    "tier_number": st.column_config.NumberColumn("Tier", format="%d"),
+                    "rank": st.column_config.NumberColumn("Rank", format="%d"),
+                    "name": "Player",
+                    "events": st.column_config.NumberColumn("Events", format="%d"),
+                    "rating": st.column_config.NumberColumn("Rating", format="%.2f"),
+                },
+            )
+            if st.button("⬇️ Apply to Tiers", key="admin_auto_apply"):
+                for tier_num in range(1, 7):
+                    names = proposed.loc[proposed["tier_number"] == tier_num, "name"].tolist()
+                    st.session_state[f"admin_tier_{tier_num}_{selected_tid}"] = sorted(names)
+                st.rerun()
+
     tier_selections = {}
     for tier_num in range(1, 7):
         existing_pids = existing_by_tier.get(tier_num, [])
         existing_names = [id_to_name[pid] for pid in existing_pids if pid in id_to_name]
+        key = f"admin_tier_{tier_num}_{selected_tid}"
 
+        # An applied proposal lives in session_state; don't also pass a default
         tier_selections[tier_num] = st.multiselect(
             f"Tier {tier_num}",
             options=player_names,
-            default=sorted(existing_names),
-            key=f"admin_tier_{tier_num}_{selected_tid}"
+            default=None if key in st.session_state else sorted(existing_names),
+            key=key
         )
 
     st.write("")
 
-    if st.button("💾 Save Tiers", type="primary", key="admin_save_tiers"):
-        cursor.execute("DELETE FROM tournament_tiers WHERE tournament_id = %s", (selected_tid,))
-        for tier_num, names in tier_selections.items():
-            for name in names:
-                pid = name_to_id[name]
-                cursor.execute("""
-                    INSERT INTO tournament_tiers (tournament_id, tier_number, player_id)
-                    VALUES (%s, %s, %s)
-                """, (selected_tid, tier_num, pid))
-        conn.commit()
-        st.success("✅ Tiers saved!")
-        st.rerun()
\ No newline at end of file
+    col_save, col_reload = st.columns([1, 1])
+    with col_save:
+        if st.button("💾 Save Tiers", type="primary", key="admin_save_tiers"):
+            existing = {(int(r["tier_number"]), r["player_id"]) for r in existing_rows}
+            selected = {
+                (tier_num, name_to_id[name])
+                for tier_num, names in tier_selections.items()
+                for name in names
+            }
+            save_tiers(conn, cursor, selected_tid, existing, selected)
+            st.success("✅ Tiers saved!")
+            st.rerun()
+    with col_reload:
+        if st.button("↻ Reload Player List", key="admin_reload_players"):
+            bump_data_version(conn, cursor, "players")
+            load_player_catalog.clear()
+            st.rerun()
+
+    # ----------------------------
+    # RESEARCH DATA
+    # ----------------------------
+    st.divider()
+    st.markdown("**Research Data**")
+    st.caption("The Research page is cached; refresh after loading new strokes-gained data.")
+    if st.button("🔄 Refresh Research", key="admin_refresh_research"):
+        refresh_research(conn, cursor)
+        st.success("✅ Research cache refreshed!")
+
+    # ----------------------------
+    # QUERY STATS
+    # ----------------------------
+    st.divider()
+    st.markdown("**Query Stats**")
+    st.caption(f"Last {len(rerun_history)} reruns across all sessions, newest first")
+
+    if rerun_history:
+        reruns = list(rerun_history)
+        reruns_df = pd.DataFrame([
+            {"At": r["at"], "Page": r["label"], "Statements": r["statements"], "SQL ms": r["ms"], "Rows": r["rows"]}
+            for r in reruns
+        ])
+        st.dataframe(reruns_df, hide_index=True, use_container_width=True)
+
+        # Where the time goes, by call-site, across those reruns
+        records = pd.DataFrame([rec for r in reruns for rec in r["records"]])
+        if not records.empty:
+            # rowcount is -1 for statements without a result (as in QueryLog.summary)
+            records["rows"] = records["rows"].clip(lower=0)
+            by_site = (
+                records.groupby("site")
+                .agg(Calls=("ms", "size"), TotalMs=("ms", "sum"), MeanMs=("ms", "mean"), Rows=("rows", "sum"))
+                .sort_values("TotalMs", ascending=False)
+                .round(2)
+                .reset_index()
+                .rename(columns={"site": "Call-site", "TotalMs": "Total ms", "MeanMs": "Mean ms"})
+            )
+            st.dataframe(by_site, hide_index=True, use_container_width=True)
+
+    if slow_queries:
+        st.markdown("**Slow Queries**")
+        slow_df = pd.DataFrame(list(slow_queries))[["at", "ms", "rows", "site", "sql"]]
+        slow_df.columns = ["At", "ms", "Rows", "Call-site", "SQL"]
+        st.dataframe(slow_df, hide_index=True, use_container_width=True)
+
+    # ----------------------------
+    # RERUN PROFILER
+    # ----------------------------
+    st.divider()
+    st.markdown("**Rerun Profiler**")
+
+    profiler.settings["enabled"] = st.toggle(
+        "Profile every rerun (all sessions)", value=profiler.settings["enabled"], key="admin_profiling"
+    )
+    profiler.settings["cprofile"] = st.checkbox(
+        "Include cProfile capture (slower)", value=profiler.settings["cprofile"], key="admin_cprofile",
+        disabled=not profiler.settings["enabled"]
+    )
+
+    recent = list(profiler.profiles)
+    if not recent:
+        st.caption("No profiles recorded yet.")
+        return
+
+    st.download_button(
+        "Export profiles (JSON)",
+        data=json.dumps(recent, indent=2),
+        file_name="rerun_profiles.json",
+        mime="application/json",
+        key="admin_export_profiles"
+    )
+
+    labels = [f"{p['at'][11:19]}  {p['label']}  ({p['total_ms']:.0f} ms)" for p in recent]
+    choice = st.selectbox("Profile", range(len(recent)), format_func=lambda i: labels[i], key="admin_profile_pick")
+    chosen = recent[choice]
+
+    # Flame-style view: one row per nesting depth, bars placed by start/duration
+    total = max(chosen["total_ms"], 1)
+    depth_rows = max((s["depth"] for s in chosen["spans"]), default=0) + 1
+    flame_html = f'<div style="position: relative; height: {depth_rows * 26}px; font-size: 11px;">'
+    for s in chosen["spans"]:
+        left = s["start_ms"] / total * 100
+        width = max(s["ms"] / total * 100, 0.3)
+        flame_html += (
+            f'<div title="{s["name"]}: {s["ms"]:.1f} ms" style="position: absolute; top: {s["depth"] * 26}px; '
+            f'left: {left:.2f}%; width: {width:.2f}%; height: 24px; overflow: hidden; white-space: nowrap; '
+            f'background-color: #E0BBE4; border: 1px solid #fafafa; padding: 2px 4px;">'
+            f'{s["name"]} {s["ms"]:.0f}ms</div>'
+        )
+    flame_html += '</div>'
+    st.markdown(flame_html, unsafe_allow_html=True)
+    st.write("")
+
+    spans_df = pd.DataFrame(chosen["spans"]).rename(
+        columns={"name": "Span", "depth": "Depth", "start_ms": "Start ms", "ms": "ms"}
+    )
+    st.dataframe(spans_df, hide_index=True, use_container_width=True)
+
+    if chosen["cprofile"]:
+        with st.expander("cProfile (top functions by cumulative time)"):
+            st.code(chosen["cprofile"])
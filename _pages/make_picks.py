@@ -1,6 +1,8 @@
 import streamlit as st
 from datetime import datetime, timezone
 
+from utils.db import data_version
+
 
 def safe_key(s: str) -> str:
     import re
@@ -8,6 +10,77 @@ def safe_key(s: str) -> str:
     return re.sub(r"[^0-9a-zA-Z_]", "", s)
 
 
+# Every user sees the same tier lists, so each tournament's roster is loaded
+# with one query and shared across sessions. The key moves when tiers or
+# player names change (data_versions, migrations/004 and 005).
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_tier_roster(_cursor, tournament_id, tiers_version, players_version):
+    """Returns {tier_number: [(player_id, name)]} for the tournament."""
+    _cursor.execute("""
+        SELECT t.tier_number, p.player_id, p.name
+        FROM tournament_tiers t
+        JOIN players p ON p.player_id = t.player_id
+        WHERE t.tournament_id = %s
+        ORDER BY t.tier_number, p.name
+    """, (tournament_id,))
+    roster = {}
+    for row in _cursor.fetchall():
+        roster.setdefault(int(row["tier_number"]), []).append((row["player_id"], row["name"]))
+    return roster
+
+
+def load_user_picks(cursor, username, tournament_id):
+    """
+    The user's saved picks as {tier_number: player_id}, read once per session,
+    user and tournament; saving picks drops the session copy.
+    """
+    key = f"_picks_{tournament_id}_{username}"
+    if key not in st.session_state:
+        cursor.execute("""
+            SELECT tier_number, player_id FROM picks
+            WHERE username=%s AND tournament_id=%s
+        """, (username, tournament_id))
+        st.session_state[key] = {int(r["tier_number"]): r["player_id"] for r in cursor.fetchall()}
+    return st.session_state[key]
+
+
+def save_picks(conn, cursor, username, tournament_id, picks):
+    """
+    Upsert the user's {tier_number: player_id} picks in one statement, keyed
+    on user_picks_id. Nothing is written unless the tournament is still open
+    (start_time > now() on the database clock); unchanged picks are skipped.
+    Returns False if picks were already locked.
+    """
+    tiers = sorted(picks)
+    cursor.execute("""
+        WITH open AS (
+            SELECT tournament_id FROM tournaments
+            WHERE tournament_id = %(tid)s AND start_time > now()
+        ), written AS (
+            INSERT INTO picks (user_picks_id, username, tournament_id, tier_number, player_id, timestamp)
+            SELECT v.user_picks_id, %(user)s, o.tournament_id, v.tier_number, v.player_id, %(ts)s
+            FROM unnest(%(ids)s::text[], %(tiers)s::int[], %(players)s::text[]) AS v(user_picks_id, tier_number, player_id)
+            CROSS JOIN open o
+            ON CONFLICT (user_picks_id) DO UPDATE
+                SET player_id = EXCLUDED.player_id, timestamp = EXCLUDED.timestamp
+                WHERE picks.player_id IS DISTINCT FROM EXCLUDED.player_id
+            RETURNING 1
+        )
+        SELECT EXISTS (SELECT 1 FROM open) AS open, (SELECT count(*) FROM written) AS written
+    """, {
+        "tid": tournament_id,
+        "user": username,
+        "ts": datetime.now(timezone.utc).isoformat(),
+        # user_picks_id is the concatenation tournament_tier_username
+        "ids": [f"{tournament_id}_{t}_{username}" for t in tiers],
+        "tiers": tiers,
+        "players": [picks[t] for t in tiers],
+    })
+    result = cursor.fetchone()
+    conn.commit()
+    return result["open"]
+
+
 def show(conn, cursor, username):
     
     # Get current tournament (next one that hasn't started yet, or current if within 5 days)
@@ -39,6 +112,9 @@ def show(conn, cursor, username):
 
     st.write("")
 
+    roster = load_tier_roster(cursor, tournament_id, data_version(cursor, "tiers"), data_version(cursor, "players"))
+    saved_picks = load_user_picks(cursor, username, tournament_id)
+
     if locked:
         st.warning("⏰ Picks are locked - tournament has started")
         st.write("")
@@ -51,23 +127,10 @@ def show(conn, cursor, username):
                 st.write(f"**Tier {tier_number}**")
             
             with col2:
-                cursor.execute("""
-                    SELECT player_id FROM picks
-                    WHERE username=%s AND tournament_id=%s AND tier_number=%s
-                """, (username, tournament_id, tier_number))
-                existing = cursor.fetchone()
+                existing_pick = saved_picks.get(tier_number)
                 
-                if existing:
-                    cursor.execute("""
-                        SELECT p.player_id, p.name
-                        FROM tournament_tiers t
-                        JOIN players p ON CAST(p.player_id AS TEXT) = CAST(t.player_id AS TEXT)
-                        WHERE t.tournament_id=%s AND t.tier_number=%s
-                    """, (tournament_id, tier_number))
-                    players = cursor.fetchall()
-                    player_options = {p["name"]: p["player_id"] for p in players}
-                    
-                    locked_name = next((name for name, pid in player_options.items() if pid == str(existing["player_id"])), "Unknown")
+                if existing_pick:
+                    locked_name = next((name for pid, name in roster.get(tier_number, []) if pid == existing_pick), "Unknown")
                     st.info(f"**{locked_name}**")
                 else:
                     st.warning("No pick submitted")
@@ -79,30 +142,19 @@ def show(conn, cursor, username):
     
     for tier_number in range(1, 7):
 
-        # Get players for this tier
-        cursor.execute("""
-            SELECT p.player_id, p.name
-            FROM tournament_tiers t
-            JOIN players p ON CAST(p.player_id AS TEXT) = CAST(t.player_id AS TEXT)
-            WHERE t.tournament_id=%s AND t.tier_number=%s
-        """, (tournament_id, tier_number))
-        players = cursor.fetchall()
+        # Players for this tier
+        players = roster.get(tier_number, [])
         
         if not players:
             st.info("No players assigned to this tier")
             picks[tier_number] = None
             continue
 
-        # Get existing pick for this user/tier
-        cursor.execute("""
-            SELECT player_id FROM picks
-            WHERE username=%s AND tournament_id=%s AND tier_number=%s
-        """, (username, tournament_id, tier_number))
-        existing = cursor.fetchone()
-        existing_pick = str(existing["player_id"]) if existing else None
+        # Existing pick for this user/tier
+        existing_pick = saved_picks.get(tier_number)
 
         # Options
-        player_options = {p["name"]: p["player_id"] for p in players}
+        player_options = {name: pid for pid, name in players}
         choice_name = None
         # If existing pick exists, get name
         for name, pid in player_options.items():
@@ -139,24 +191,10 @@ def show(conn, cursor, username):
     
     # Single save button
     if st.button("💾 Save Picks", type="primary", disabled=bool(missing_tiers)):
-        # Delete all existing picks for this tournament
-        cursor.execute("""
-            DELETE FROM picks
-            WHERE username=%s AND tournament_id=%s
-        """, (username, tournament_id))
-
-        now = datetime.now(timezone.utc)
-        # Insert all new picks
-        for tier_number, player_id in picks.items():
-            if player_id:  # Should always be true due to validation
-                # Create user_picks_id as concatenation
-                user_picks_id = f"{tournament_id}_{tier_number}_{username}"
-                
-                cursor.execute("""
-                    INSERT INTO picks (username, tournament_id, tier_number, player_id, timestamp, user_picks_id)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (username, tournament_id, tier_number, player_id, now.isoformat(), user_picks_id))
-        
-        conn.commit()
+        saved = save_picks(conn, cursor, username, tournament_id, picks)
+        st.session_state.pop(f"_picks_{tournament_id}_{username}", None)
+        if not saved:
+            st.error("⏰ Picks locked before your save went through - tournament has started")
+            return
         st.success("✅ All picks saved successfully!")
         st.rerun()
\ No newline at end of file
@@ -1,38 +1,74 @@
 import streamlit as st
 import pandas as pd
+from matplotlib import colormaps, colors
 
+from utils.db import data_version, bump_data_version
+from utils.profiler import span
 
-def show(conn, cursor):
+SG_COLS = ["Putt", "ARG", "APP", "OTT", "T2G", "Total"]
 
-    st.subheader("Research")
-    st.caption("Last 6 Months")
 
-    cursor.execute("""
+def _gradient_css(values, cmap="RdYlGn", vmin=-4, vmax=4):
+    """Same colours as Styler.background_gradient, computed once instead of per render."""
+    rgba = colormaps[cmap](colors.Normalize(vmin, vmax)(values.to_numpy(dtype=float)))
+    lum = 0.2126 * _channel(rgba[:, 0]) + 0.7152 * _channel(rgba[:, 1]) + 0.0722 * _channel(rgba[:, 2])
+    return [
+        "" if pd.isna(v) else f"background-color: {colors.rgb2hex(c)}; color: {'#f1f1f1' if l < 0.408 else '#000000'}"
+        for v, c, l in zip(values, rgba, lum)
+    ]
+
+
+def _channel(x):
+    return (x <= 0.04045) * (x / 12.92) + (x > 0.04045) * ((x + 0.055) / 1.055) ** 2.4
+
+
+# Research data changes at most weekly, so the dataset and its colours are
+# cached per data_versions stamp and shared by every session.
+@st.cache_data(show_spinner=False, max_entries=2)
+def load_research(_cursor, version):
+    """Returns (df, style_df) with metrics rounded and T2G colours precomputed."""
+    _cursor.execute("""
         SELECT "Player", "Events", "SG Putt", "SG ARG", "SG APP", "SG OTT", "SG T2G", "SG Total"
         FROM research
         ORDER BY "SG T2G" DESC NULLS LAST
     """)
-    rows = cursor.fetchall()
+    rows = _cursor.fetchall()
 
-    if not rows:
-        st.info("No research data available.")
-        return
-
-    df = pd.DataFrame(rows)
+    df = pd.DataFrame(rows, columns=["Player", "Events", "SG Putt", "SG ARG", "SG APP", "SG OTT", "SG T2G", "SG Total"])
     df = df.rename(columns={"SG Putt": "Putt", "SG ARG": "ARG", "SG APP": "APP", "SG OTT": "OTT", "SG T2G": "T2G", "SG Total": "Total"})
 
-    SG_COLS = ["Putt", "ARG", "APP", "OTT", "T2G", "Total"]
+    # Metrics are typed columns (migrations/003, load_research.py); None -> NaN
+    df[SG_COLS] = df[SG_COLS].astype("float64").round(2)
+
+    style_df = pd.DataFrame("", index=df.index, columns=df.columns)
+    style_df["T2G"] = _gradient_css(df["T2G"])
+    return df, style_df
 
-    for c in SG_COLS:
-        df[c] = pd.to_numeric(df[c], errors="coerce").round(2)
-    df["Events"] = pd.to_numeric(df["Events"], errors="coerce")
+
+def refresh_research(conn, cursor):
+    """Bump the research version stamp and drop cached research data."""
+    bump_data_version(conn, cursor, "research")
+    load_research.clear()
+
+
+def show(conn, cursor):
+
+    st.subheader("Research")
+    st.caption("Last 6 Months")
+
+    df, style_df = load_research(cursor, data_version(cursor, "research"))
+
+    if df.empty:
+        st.info("No research data available.")
+        return
 
     column_config = {
         "Events": st.column_config.NumberColumn("Events", format="%d"),
         **{c: st.column_config.NumberColumn(c, format="%.10g") for c in SG_COLS}
     }
 
-    styled = df.style.background_gradient(subset=["T2G"], cmap="RdYlGn", vmin=-4, vmax=4)
+    styled = df.style.apply(lambda _: style_df, axis=None)
 
     height = (len(df) + 1) * 35 + 3
-    st.dataframe(styled, hide_index=True, use_container_width=True, height=height, column_config=column_config)
+    with span("research table (styler)"):
+        st.dataframe(styled, hide_index=True, use_container_width=True, height=height, column_config=column_config)
@@ -2,6 +2,37 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, timezone
 
+from utils.scoring import player_scores, score_picks, format_score
+from utils.profiler import span
+from utils.live_poller import live_snapshot, get_poller
+from utils.leaderboard_history import install_recorder, load_history, team_trajectories
+from utils.db import get_pool
+
+# How often an open This Week page checks the poller for a newer leaderboard
+LIVE_CHECK_SECONDS = 15
+
+
+# Recomputed only when the poller publishes a new version (and so a new
+# history row set); picks are a tuple of (username, player_id). Only called
+# once the version is recorded, so a history read before the recorder's
+# write lands is never cached for everyone.
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_team_trajectories(_cursor, org_id, tourn_id, year, picks, version):
+    """Team score per username at every recorded leaderboard change."""
+    return team_trajectories(load_history(_cursor, org_id, tourn_id, year), list(picks))
+
+
+@st.fragment(run_every=LIVE_CHECK_SECONDS)
+def watch_leaderboard(api_key, org_id, tourn_id, year, shown):
+    """
+    Rerun the page only when the poller has published a newer leaderboard
+    than the one shown, or recorded it to history since. `shown` is the
+    shown snapshot's (version, recorded), or None.
+    """
+    snapshot = get_poller(api_key, org_id, tourn_id, year).read(wait=0)
+    if snapshot is not None and (snapshot.version, snapshot.recorded) != shown:
+        st.rerun()
+
 
 def show(conn, cursor, api_key):
 
@@ -52,291 +83,133 @@ def show(conn, cursor, api_key):
     usernames = [u["username"] for u in users]
     name_map = {u["username"]: u["name"] for u in users}
 
-    # 2️⃣ Get picks for this tournament
+    # 2️⃣ Get picks for this tournament, with player names, in one query
     cursor.execute("""
-        SELECT username, tier_number, player_id
-        FROM picks
-        WHERE tournament_id=%s
+        SELECT pk.username, pk.tier_number, pk.player_id, p.name_last
+        FROM picks pk
+        LEFT JOIN players p ON p.player_id = pk.player_id
+        WHERE pk.tournament_id=%s
     """, (tournament_id,))
     rows = cursor.fetchall()
 
-    # 3️⃣ Build lookup: username -> tier_number -> player_id
+    # Tier assignments for the whole field (player_id -> tier_number)
+    cursor.execute("""
+        SELECT player_id, tier_number
+        FROM tournament_tiers
+        WHERE tournament_id = %s
+    """, (tournament_id,))
+    tier_by_player = {r["player_id"]: r["tier_number"] for r in cursor.fetchall()}
+
+    # 3️⃣ Build lookups: username -> tier_number -> player_id, and player_id -> last name
     pick_map = {u: {tier: None for tier in range(1, 7)} for u in usernames}
+    last_names = {}
     for row in rows:
         pick_map[row["username"]][row["tier_number"]] = row["player_id"]
+        if row["name_last"]:
+            last_names[row["player_id"]] = row["name_last"]
 
-    # 4️⃣ Build display table
+    # 4️⃣ Score picks against the live leaderboard (see utils.scoring)
+    # Only fetch live data if the tournament has started (locked)
+    # The leaderboard comes from the background poller (utils.live_poller);
+    # viewers never trigger an upstream fetch themselves
+    # Tournaments without a tourn_id have no leaderboard to poll
+    scores = player_scores([], [])
+    snapshot = None
+    if locked and t_tourn_id:
+        with span("leaderboard snapshot"):
+            install_recorder(get_pool())
+            snapshot = live_snapshot(api_key, t_org_id, t_tourn_id, t_year)
+        if snapshot is not None:
+            scores = player_scores(
+                snapshot.df["PlayerID"],
+                snapshot.df["Score"],
+                snapshot.df["Status"],
+                score=snapshot.df["ScoreToPar"],
+            )
+
+    with span("scoring"):
+        pick_df, team_df = score_picks(
+            [(r["username"], r["tier_number"], r["player_id"]) for r in rows],
+            scores
+        )
+    tier_winners = set(zip(pick_df.loc[pick_df["tier_winner"], "username"],
+                           pick_df.loc[pick_df["tier_winner"], "tier_number"]))
+    missed_cuts = set(zip(pick_df.loc[pick_df["missed_cut"], "username"],
+                          pick_df.loc[pick_df["missed_cut"], "tier_number"]))
+
+    # 5️⃣ Build display table (cells) and matching style table
+    # ❌ marks a missed cut (unless the pick also won the tier); bold marks a tier winner that made the cut
     table = []
+    style_table = []
     for user in users:
         username = user["username"]
         row_data = {"User": user["name"]}
+        style_data = {"User": user["name"]}
 
         for tier_number in range(1, 7):
             pick_id = pick_map[username][tier_number]
+            col = f"Tier {tier_number}"
+            style_data[col] = ""
 
             if pick_id and locked:
                 # Show pick if tournament started
-                cursor.execute("SELECT name_last FROM players WHERE player_id=%s", (pick_id,))
-                player = cursor.fetchone()
-                pick_name = player["name_last"] if player else "Unknown"
-                row_data[f"Tier {tier_number}"] = pick_name
+                pick_name = last_names.get(str(pick_id), "Unknown")
+                is_winner = (username, tier_number) in tier_winners
+                is_missed_cut = (username, tier_number) in missed_cuts
+                if is_missed_cut and not is_winner:
+                    pick_name = f"❌ {pick_name}"
+                if is_winner and not is_missed_cut:
+                    style_data[col] = "font-weight: bold"
+                row_data[col] = pick_name
             else:
                 # Tournament not started or pick not made
-                # row_data[f"Tier {tier_number}"] = "🔒"
-                row_data[f"Tier {tier_number}"] = "-"
+                row_data[col] = "-"
 
         table.append(row_data)
+        style_table.append(style_data)
 
-    # 5️⃣ Build DataFrame
-    df = pd.DataFrame(table)
-
-    # Get leaderboard to highlight leaders in each tier and track missed cuts
-    # Only fetch live data if the tournament has started (locked)
-    score_lookup = {}
-    name_to_id = {}
-    cut_status = {}
-
-    if locked:
-        try:
-            from utils.leaderboard_api import get_live_leaderboard
-            leaderboard_for_highlight = get_live_leaderboard(api_key, t_org_id, t_tourn_id, t_year)
-
-            # Create score lookup and cut status
-            for _, lb_row in leaderboard_for_highlight.iterrows():
-                player_id = str(lb_row["PlayerID"])
-                score = lb_row["Score"]
-                status = str(lb_row.get("Status", "active")).lower()
-
-                # Track missed cuts
-                cut_status[player_id] = (status == "cut")
-
-                if score == "E":
-                    numeric_score = 0
-                elif isinstance(score, str):
-                    try:
-                        numeric_score = int(score.replace("+", ""))
-                    except:
-                        numeric_score = 999
-                else:
-                    numeric_score = 999
-                score_lookup[player_id] = numeric_score
-
-            # Build a reverse lookup: player_name -> player_id
-            for username in usernames:
-                for tier_num in range(1, 7):
-                    pick_id = pick_map[username][tier_num]
-                    if pick_id:
-                        cursor.execute("SELECT name_last FROM players WHERE player_id=%s", (pick_id,))
-                        player = cursor.fetchone()
-                        if player:
-                            name_to_id[player["name_last"]] = str(pick_id)
-
-        except Exception:
-            score_lookup = {}
-            name_to_id = {}
-            cut_status = {}
-
-    # Calculate cumulative scores for each user
-    user_scores = {}
-    numeric_scores = {}
-
-    for user in users:
-        username = user["username"]
-        user_name = user["name"]
-        total_score = 0
-        valid_scores = 0  # Track how many valid scores we have
-
-        for tier_number in range(1, 7):
-            pick_id = pick_map[username][tier_number]
-            if pick_id and str(pick_id) in score_lookup:
-                score = score_lookup[str(pick_id)]
-                if score != 999:  # Only count real scores, not placeholder
-                    total_score += score
-                    valid_scores += 1
-
-        # Only show score if we have valid scores, otherwise show "E"
-        if valid_scores == 0:
-            numeric_scores[user_name] = 0
-            user_scores[user_name] = "E"
-        else:
-            numeric_scores[user_name] = total_score
-            if total_score == 0:
-                score_display = "E"
-            elif total_score < 0:
-                score_display = str(total_score)
-            else:
-                score_display = f"+{total_score}"
-            user_scores[user_name] = score_display
-
-    # Find user(s) with best score
-    if numeric_scores:
-        best_score = min(numeric_scores.values())
-        leaders = [name for name, score in numeric_scores.items() if score == best_score]
-    else:
-        leaders = []
-
-    # Calculate weekly points for each user
+    # Team score and weekly points per user
     weekly_points = {}
+    team_score_row = {}
     for user in users:
         username = user["username"]
         user_name = user["name"]
-        points = 0
-        
-        # Count tier wins
-        for tier_number in range(1, 7):
-            pick_id = pick_map[username][tier_number]
-            if pick_id and str(pick_id) in score_lookup:
-                player_id = str(pick_id)
-                
-                # Find tier leader
-                tier_picks = {}
-                for u in usernames:
-                    u_pick = pick_map[u].get(tier_number)
-                    if u_pick and str(u_pick) in score_lookup:
-                        tier_picks[u] = score_lookup[str(u_pick)]
-                
-                if tier_picks:
-                    tier_best = min(tier_picks.values())
-                    if score_lookup[player_id] == tier_best:
-                        points += 1  # +1 for tier win
-                
-                # Check for missed cut
-                if cut_status.get(player_id, False):
-                    points -= 1  # -1 for missed cut
-        
-        # Check for best overall team score
-        if user_name in leaders and numeric_scores[user_name] != 0:
-            points += 1  # +1 for best team score
-        
-        weekly_points[user_name] = points
-
-    # Add team score row to the transposed dataframe
-    transposed_df = df.set_index('User').T
+        has_team = username in team_df.index
+        weekly_points[user_name] = int(team_df.at[username, "points"]) if has_team else 0
 
-    # Create a new row for team scores WITH trophy for leaders
-    team_score_row = {}
-    for user in users:
-        user_name = user["name"]
-        
         if locked:  # Only show scores if tournament started
-            score_display = user_scores.get(user_name, "E")
-            
+            score_display = format_score(team_df.at[username, "team_score"] if has_team else None)
+
             # Add trophy if this user is leading
-            if user_name in leaders and score_display != "E":
+            if has_team and team_df.at[username, "best_team"]:
                 team_score_row[user_name] = f"🏆 {score_display}"
             else:
                 team_score_row[user_name] = score_display
         else:
             team_score_row[user_name] = "🔒"  # Hide scores before tournament with "lock" symbol
 
-    # Insert team score row at the bottom
+    # Transpose so users are columns, with the team score row on top
+    transposed_df = pd.DataFrame(table).set_index('User').T
+    transposed_styles = pd.DataFrame(style_table).set_index('User').T
+
     team_score_df = pd.DataFrame([team_score_row], index=["Team Score"])
+    team_style_df = pd.DataFrame([{c: "" for c in team_score_row}], index=["Team Score"])
     if locked:
         transposed_with_score = pd.concat([team_score_df, transposed_df])
+        style_df = pd.concat([team_style_df, transposed_styles])
     else:
         transposed_with_score = team_score_df
-
-    # Modify cell values to add X for missed cuts (but NOT if they won tier)
-    def add_missed_cut_symbol(s):
-        if s.name == "Team Score":
-            return s  # Don't modify team score row
-        
-        # First find tier leaders
-        tier_scores = {}
-        for user_name in s.index:
-            player_name = s[user_name]
-            if player_name == "🔒" or player_name not in name_to_id:
-                continue
-            player_id = name_to_id[player_name]
-            if player_id in score_lookup:
-                tier_scores[user_name] = score_lookup[player_id]
-        
-        best_score = min(tier_scores.values()) if tier_scores else None
-        
-        modified_values = []
-        for user_name in s.index:
-            player_name = s[user_name]
-            
-            if player_name == "🔒" or player_name not in name_to_id:
-                modified_values.append(player_name)
-                continue
-            
-            player_id = name_to_id[player_name]
-            
-            # Check if tier leader
-            is_leader = (player_id in score_lookup and 
-                        score_lookup[player_id] == best_score)
-            
-            # Check for missed cut
-            is_missed_cut = cut_status.get(player_id, False)
-            
-            # Only add X if missed cut AND not tier leader
-            if is_missed_cut and not is_leader:
-                modified_values.append(f"❌ {player_name}")
-            else:
-                modified_values.append(player_name)
-        
-        return modified_values
-    
-    # Apply symbols to the dataframe BEFORE styling
-    transposed_with_score = transposed_with_score.apply(add_missed_cut_symbol, axis=1)
-    
-    # Style function to bold tier leaders only (but NOT if they also missed cut)
-    def highlight_tier_leaders(s):
-        if s.name == "Team Score":
-            return [''] * len(s)
-
-        tier_scores = {}
-
-        for user_name in s.index:
-            player_name = str(s[user_name]).replace("❌ ", "")  # Remove X to get original name
-            if player_name == "🔒" or player_name not in name_to_id:
-                continue
-
-            player_id = name_to_id[player_name]
-            if player_id in score_lookup:
-                tier_scores[user_name] = score_lookup[player_id]
-
-        if not tier_scores:
-            return [''] * len(s)
-
-        best_score = min(tier_scores.values())
-
-        styles = []
-        for user_name in s.index:
-            cell_value = str(s[user_name])
-            player_name = cell_value.replace("❌ ", "")
-            
-            # Check if tier leader
-            is_leader = (player_name != "🔒" and 
-                        player_name in name_to_id and 
-                        name_to_id[player_name] in score_lookup and 
-                        score_lookup[name_to_id[player_name]] == best_score)
-            
-            # Check if this player also missed cut (look up in cut_status directly)
-            player_missed_cut = False
-            if player_name in name_to_id:
-                player_id = name_to_id[player_name]
-                player_missed_cut = cut_status.get(player_id, False)
-            
-            # Only bold if leader AND didn't miss cut
-            if is_leader and not player_missed_cut:
-                styles.append('font-weight: bold')
-            else:
-                styles.append('')
-        
-        return styles
-    
+        style_df = team_style_df
 
     # Apply styling
     styled_picks_df = (transposed_with_score.style
-                    .apply(highlight_tier_leaders, axis=1)
+                    .apply(lambda _: style_df, axis=None)
                     .set_properties(**{'text-align': 'center', 'font-size': '12px'})
                     .set_table_styles([
                         {'selector': 'th', 'props': [('font-size', '12px')]},
                         {'selector': 'th.col_heading', 'props': [('font-size', '12px')]}
                     ]))
-    
+
     # Column config WITHOUT trophy in headers
     column_config = {}
     for user in users:
@@ -367,66 +240,59 @@ def show(conn, cursor, api_key):
     st.markdown(points_html, unsafe_allow_html=True)
     st.write("")
 
-    st.dataframe(
-        styled_picks_df,
-        width="stretch",
-        height='content',
-        hide_index=True,
-        column_config=column_config
-    )
+    with span("picks table (styler)"):
+        st.dataframe(
+            styled_picks_df,
+            width="stretch",
+            height='content',
+            hide_index=True,
+            column_config=column_config
+        )
 
     st.write("")
 
+    if locked and snapshot is not None:
+        picks = tuple((r["username"], r["player_id"]) for r in rows)
+        with span("team trajectories"):
+            if snapshot.recorded:
+                trajectories = load_team_trajectories(cursor, t_org_id, t_tourn_id, t_year, picks, snapshot.version)
+            else:
+                trajectories = team_trajectories(load_history(cursor, t_org_id, t_tourn_id, t_year), list(picks))
+        if len(trajectories) > 1:
+            st.markdown("**Team Score Over Time**")
+            st.line_chart(trajectories.rename(columns=name_map), height=250)
+            st.write("")
+
     # Only show leaderboard if tournament has started
     if locked:
-        # Get picked players for this tournament
-        def get_picked_players(conn, tournament_id):
-            cur = conn.cursor()
-            cur.execute("""
-                SELECT DISTINCT player_id
-                FROM picks
-                WHERE tournament_id = %s
-            """, (tournament_id,))
-
-            rows = cur.fetchall()
-            player_ids = [str(row["player_id"]) for row in rows]
-            return player_ids
-
         # Leaderboard API call and display
         try:
-            from utils.leaderboard_api import get_live_leaderboard
-            leaderboard = get_live_leaderboard(api_key, t_org_id, t_tourn_id, t_year)
+            leaderboard = snapshot.df.copy() if snapshot is not None else pd.DataFrame()
             
             # Check if leaderboard is empty before filtering
             if leaderboard.empty:
                 st.info("🏌️ Live leaderboard will appear once the tournament begins")
             else:
-                picked_ids = get_picked_players(conn, tournament_id)
-                leaderboard = leaderboard[leaderboard["PlayerID"].isin(picked_ids)]
+                picked_ids = {row["player_id"] for row in rows}
+                leaderboard = leaderboard[leaderboard["PlayerID"].astype(str).isin(picked_ids)]
                 
                 # Check if leaderboard is empty after filtering
                 if leaderboard.empty:
                     st.info("🏌️ Live leaderboard will appear once the tournament begins")
                 else:
                     # Check if scores are valid (not all dashes/empty)
-                    valid_scores = leaderboard["Score"].apply(lambda x: x not in ["-", "", None, "nan"]).any()
+                    valid_scores = leaderboard["ScoreToPar"].notna().any()
                     if not valid_scores:
                         st.info("🏌️ Live leaderboard will appear once the tournament begins")
                     else:
                         # Create player_id to tier lookup before dropping PlayerID
-                        player_tier_map = {}
-                        for _, row in leaderboard.iterrows():
-                            player_id = str(row["PlayerID"])
-                            cursor.execute("""
-                                SELECT tier_number
-                                FROM tournament_tiers
-                                WHERE tournament_id = %s AND player_id = %s
-                            """, (tournament_id, player_id))
-                            tier_result = cursor.fetchone()
-                            if tier_result:
-                                player_tier_map[row["Player"]] = tier_result["tier_number"]
-
-                        leaderboard.drop(columns=["PlayerID", "Status"], inplace=True)
+                        player_tier_map = {
+                            player: tier_by_player[str(pid)]
+                            for pid, player in zip(leaderboard["PlayerID"], leaderboard["Player"])
+                            if str(pid) in tier_by_player
+                        }
+
+                        leaderboard.drop(columns=["PlayerID", "ScoreToPar", "Status"], inplace=True)
 
                         # Reset index
                         df_display = leaderboard.reset_index(drop=True)
@@ -454,14 +320,21 @@ def show(conn, cursor, api_key):
                             .set_properties(**{'font-size': '12px'})
                         )
 
-                        st.dataframe(
-                            styled_leaderboard_df,
-                            width="stretch",
-                            height=500,
-                            hide_index=True
-                        )
+                        with span("leaderboard table (styler)"):
+                            st.dataframe(
+                                styled_leaderboard_df,
+                                width="stretch",
+                                height=500,
+                                hide_index=True
+                            )
                 
         except Exception as e:
             st.info("🏌️ Live leaderboard will appear once the tournament begins")
+
+        if t_tourn_id:
+            watch_leaderboard(
+                api_key, t_org_id, t_tourn_id, t_year,
+                (snapshot.version, snapshot.recorded) if snapshot else None,
+            )
     else:
         st.info("🏌️ Live leaderboard will appear when the tournament begins.")
\ No newline at end of file
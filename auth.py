@@ -1,9 +1,13 @@
 import streamlit as st
-import bcrypt
 from streamlit_cookies_controller import CookieController
 
+from utils.passwords import hash_password, check_password, login_throttle, client_ip
+
 controller = CookieController()
 
+# Shown when a password hash times out in the bcrypt queue (utils.passwords.HASH_TIMEOUT)
+BUSY_MESSAGE = "Lots of people are signing in right now. Please try again in a moment."
+
 
 def init_auth():
     """Check cookies and initialize session state"""
@@ -35,14 +39,26 @@ def show_login(cursor):
         submit = st.form_submit_button("Login")
         
         if submit:
-            if login_username and login_password:
+            ip = client_ip()
+            throttle_keys = (f"user:{login_username.lower()}", f"ip:{ip}" if ip else None)
+            retry_after = login_throttle.retry_after(*throttle_keys)
+            if retry_after:
+                st.error(f"Too many failed attempts. Try again in {retry_after // 60 + 1} min.")
+            elif login_username and login_password:
                 cursor.execute(
                     "SELECT username, name, password_hash FROM users WHERE username=%s",
                     (login_username,)
                 )
                 user = cursor.fetchone()
-                
-                if user and bcrypt.checkpw(login_password.encode(), user["password_hash"].encode()):
+
+                try:
+                    valid = bool(user) and check_password(login_password, user["password_hash"])
+                except TimeoutError:
+                    st.error(BUSY_MESSAGE)
+                    return
+
+                if valid:
+                    login_throttle.reset(throttle_keys[0])
                     st.session_state["authentication_status"] = True
                     st.session_state["username"] = user["username"]
                     st.session_state["name"] = user["name"]
@@ -54,6 +70,7 @@ def show_login(cursor):
                     st.success("Login successful!")
                     st.rerun()
                 else:
+                    login_throttle.record_failure(*throttle_keys)
                     st.session_state["authentication_status"] = False
                     st.error("Username/password is incorrect")
             else:
@@ -78,9 +95,11 @@ def show_signup(cursor, conn):
                 if cursor.fetchone():
                     st.error("Username already exists")
                 else:
-                    pw_hash = bcrypt.hashpw(
-                        new_pw.encode(), bcrypt.gensalt()
-                    ).decode()
+                    try:
+                        pw_hash = hash_password(new_pw)
+                    except TimeoutError:
+                        st.error(BUSY_MESSAGE)
+                        return
 
                     cursor.execute("""
                         INSERT INTO users (username, name, password_hash)
@@ -120,9 +139,14 @@ def show_password_change(cursor, conn, username):
                 result = cursor.fetchone()
                 if result:
                     stored_hash = result["password_hash"]
-                    if bcrypt.checkpw(old_pw.encode(), stored_hash.encode()):
+                    try:
+                        old_ok = check_password(old_pw, stored_hash)
+                        new_hash = hash_password(new_pw) if old_ok and new_pw == confirm_pw else None
+                    except TimeoutError:
+                        st.error(BUSY_MESSAGE)
+                        return
+                    if old_ok:
                         if new_pw == confirm_pw:
-                            new_hash = bcrypt.hashpw(new_pw.encode(), bcrypt.gensalt()).decode()
                             cursor.execute("UPDATE users SET password_hash=%s WHERE username=%s", (new_hash, username))
                             conn.commit()
                             st.success("Password updated successfully!")
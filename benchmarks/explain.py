@@ -0,0 +1,129 @@
+"""
+Check that the app's hot queries can reach every table through an index.
+
+Runs EXPLAIN (never EXPLAIN ANALYZE, so nothing is executed) for each query
+below with sequential scans, hash joins and merge joins disabled, and fails
+if a listed table is not reached by an index condition. A join that casts
+player_id, or a missing index, shows up here long before it shows up in page
+timings.
+
+    BENCH_DB_URL=postgresql://postgres@localhost/ylpicks_bench \\
+        python -m benchmarks.explain
+
+Falls back to SUPABASE_DB_URL (environment or .streamlit/secrets.toml) when
+BENCH_DB_URL is unset; read-only, so it is safe against the real league.
+tests/test_explain.py runs the same check under pytest when BENCH_DB_URL is set.
+"""
+import json
+import os
+import sys
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from utils.config import load_secret
+
+# name -> (sql, tables that must be read through an index)
+QUERIES = {
+    "make_picks roster": ("""
+        SELECT t.tier_number, p.player_id, p.name
+        FROM tournament_tiers t
+        JOIN players p ON p.player_id = t.player_id
+        WHERE t.tournament_id = %(tid)s
+        ORDER BY t.tier_number, p.name
+    """, ["tournament_tiers", "players"]),
+    "make_picks user picks": ("""
+        SELECT tier_number, player_id FROM picks
+        WHERE username = %(user)s AND tournament_id = %(tid)s
+    """, ["picks"]),
+    "this_week picks": ("""
+        SELECT pk.username, pk.tier_number, pk.player_id, p.name_last
+        FROM picks pk
+        LEFT JOIN players p ON p.player_id = pk.player_id
+        WHERE pk.tournament_id = %(tid)s
+    """, ["picks", "players"]),
+    "this_week tiers": ("""
+        SELECT player_id, tier_number FROM tournament_tiers
+        WHERE tournament_id = %(tid)s
+    """, ["tournament_tiers"]),
+    "results pick_scores": ("""
+        SELECT tr.tournament_id, tr.username, tr.tier_number, tr.player_id, p.name
+        FROM pick_scores tr
+        JOIN players p ON p.player_id = tr.player_id
+        WHERE tr.tournament_id = ANY(%(tids)s)
+    """, ["pick_scores", "players"]),
+    "results tournament_scores": ("""
+        SELECT tournament_id, username, points FROM tournament_scores
+        WHERE tournament_id = ANY(%(tids)s)
+    """, ["tournament_scores"]),
+}
+
+
+def indexed_tables(plan):
+    """Tables some node of `plan` reads through an index condition."""
+    found = set()
+    node_type = plan.get("Node Type")
+    if node_type in ("Index Scan", "Index Only Scan") and "Index Cond" in plan:
+        found.add(plan["Relation Name"])
+    if node_type == "Bitmap Heap Scan":
+        found.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found |= indexed_tables(child)
+    return found
+
+
+def sample_params(cursor):
+    cursor.execute("""
+        SELECT pk.tournament_id, pk.username
+        FROM picks pk
+        ORDER BY pk.tournament_id DESC
+        LIMIT 1
+    """)
+    row = cursor.fetchone() or {"tournament_id": "", "username": ""}
+    return {"tid": row["tournament_id"], "user": row["username"], "tids": [row["tournament_id"]]}
+
+
+def connect(dsn):
+    return psycopg2.connect(dsn, sslmode=os.environ.get("BENCH_DB_SSLMODE", "prefer"), cursor_factory=RealDictCursor)
+
+
+def missing_indexes(conn):
+    """
+    {query name: [tables not reached through an index]} for every entry of
+    QUERIES. Leaves the connection rolled back.
+    """
+    missing = {}
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SET enable_seqscan = off; SET enable_hashjoin = off; SET enable_mergejoin = off")
+        params = sample_params(cursor)
+
+        for name, (sql, tables) in QUERIES.items():
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()["QUERY PLAN"]
+            plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+            missing[name] = [t for t in tables if t not in indexed_tables(plan)]
+    finally:
+        conn.rollback()
+    return missing
+
+
+def main():
+    conn = connect(os.environ.get("BENCH_DB_URL") or load_secret("SUPABASE_DB_URL"))
+    try:
+        missing = missing_indexes(conn)
+    finally:
+        conn.close()
+
+    failures = []
+    for name, tables in missing.items():
+        print(f"{name:<26} {'ok' if not tables else 'NO INDEX: ' + ', '.join(tables)}")
+        failures += [f"{name}: {t}" for t in tables]
+
+    if failures:
+        print("\nTables read without an index condition:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Page-render benchmarks with statement and API-call budgets.
+
+Seeds a local Postgres (benchmarks/seed.py), replays recorded leaderboards
+instead of calling RapidAPI, then drives app.py with Streamlit's AppTest for
+every page at each league size and reports p50/p95 render time, SQL
+statements, rows and approximate result bytes fetched, and leaderboard API
+calls per rerun.
+Exits non-zero when any page exceeds its budget.
+
+    BENCH_DB_URL=postgresql://postgres@localhost/ylpicks_bench \\
+        python -m benchmarks.run --users 10 100 1000 --runs 20
+
+The app's tables in the target database are dropped and re-created for
+every size. Never point
+BENCH_DB_URL at a real league.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import psycopg2
+import streamlit as st
+from psycopg2.extras import RealDictCursor
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.seed import seed, ADMIN
+from utils import leaderboard_api, live_poller
+from utils.db import statement_stats
+
+APP = str(Path(__file__).resolve().parent.parent / "app.py")
+
+PAGES = ["This Week", "Make Picks", "Results", "Research", "Admin"]
+
+# Per-rerun budgets (whole script: app.py preamble + page). Statements and
+# API calls are counted on warm reruns, after the first render of a page.
+BUDGETS = {
+    "This Week":  {"p95_ms": 1500, "statements": 8,  "api_calls": 1},
+    "Make Picks": {"p95_ms": 1000, "statements": 16, "api_calls": 0},
+    "Results":    {"p95_ms": 1500, "statements": 6,  "api_calls": 0},
+    "Research":   {"p95_ms": 800,  "statements": 4,  "api_calls": 0},
+    "Admin":      {"p95_ms": 1500, "statements": 6,  "api_calls": 0},
+}
+
+
+class CountingBackend:
+    """Wraps a leaderboard backend and counts upstream fetches."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.calls = 0
+
+    def fetch(self, *args):
+        self.calls += 1
+        return self.backend.fetch(*args)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def bench_page(at, page, runs, backend):
+    """Render `page` once to warm caches, then `runs` more times. Returns a result dict."""
+    at.sidebar.radio[0].set_value(page)
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"{page} raised: {at.exception[0].message}")
+
+    timings = []
+    statement_stats.reset()
+    backend.calls = 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    stats = statement_stats.snapshot()
+    return {
+        "page": page,
+        "p50_ms": round(statistics.median(timings), 1),
+        "p95_ms": round(percentile(timings, 95), 1),
+        "statements": stats["statements"] / runs,
+        "rows": stats["rows"] / runs,
+        "bytes": stats["bytes"] / runs,
+        "api_calls": backend.calls / runs,
+    }
+
+
+def over_budget(result):
+    budget = BUDGETS[result["page"]]
+    return [
+        f"{key} {result[key]:g} > {limit}"
+        for key, limit in budget.items()
+        if result[key] > limit
+    ]
+
+
+def run_size(dsn, users, field, weeks, runs):
+    snapshot_root = tempfile.mkdtemp(prefix="ylpicks-bench-")
+    conn = psycopg2.connect(dsn, cursor_factory=RealDictCursor)
+    try:
+        seed(conn, users, field=field, weeks=weeks, snapshot_root=snapshot_root)
+    finally:
+        conn.close()
+
+    backend = CountingBackend(leaderboard_api.ReplayBackend(snapshot_root))
+    leaderboard_api.set_backend(backend)
+    live_poller.stop_pollers()
+    st.cache_data.clear()
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.secrets["SUPABASE_DB_URL"] = dsn
+    at.secrets["DB_SSLMODE"] = os.environ.get("BENCH_DB_SSLMODE", "disable")
+    at.secrets["RAPIDAPI_KEY"] = "bench"
+    at.session_state["authentication_status"] = True
+    at.session_state["username"] = ADMIN
+    at.session_state["name"] = "Mike"
+    at.run()
+
+    return [dict(bench_page(at, page, runs, backend), users=users) for page in PAGES]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page renders against a seeded local database.")
+    parser.add_argument("--users", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--field", type=int, default=150)
+    parser.add_argument("--weeks", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    args = parser.parse_args()
+
+    dsn = os.environ.get("BENCH_DB_URL")
+    if not dsn:
+        sys.exit("Set BENCH_DB_URL to a disposable local Postgres database.")
+
+    statement_stats.track_bytes = True
+    results = []
+    failures = []
+
+    print(f"{'users':>6}  {'page':<11} {'p50 ms':>8} {'p95 ms':>8} {'stmts':>6} {'rows':>8} {'bytes':>10} {'api':>4}")
+    for users in args.users:
+        for result in run_size(dsn, users, args.field, args.weeks, args.runs):
+            results.append(result)
+            problems = over_budget(result)
+            failures += [f"{users} users / {result['page']}: {p}" for p in problems]
+            print(
+                f"{users:>6}  {result['page']:<11} {result['p50_ms']:>8} {result['p95_ms']:>8} "
+                f"{result['statements']:>6g} {result['rows']:>8g} {result['bytes']:>10g} {result['api_calls']:>4g}"
+                + ("  OVER BUDGET" if problems else "")
+            )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+    if failures:
+        print("\nBudget exceeded:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
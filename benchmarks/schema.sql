@@ -0,0 +1,125 @@
+-- Schema for the local benchmark database (benchmarks/run.py).
+-- Mirrors the tables the app reads and writes; see migrations/ for changes
+-- applied to production.
+
+DROP TABLE IF EXISTS
+    users, tournaments, players, tournament_tiers, picks, pick_scores,
+    tournament_scores, player_score_cache, research, season_standings,
+    data_versions, leaderboard_history
+CASCADE;
+
+CREATE TABLE users (
+    username      TEXT PRIMARY KEY,
+    name          TEXT NOT NULL,
+    password_hash TEXT NOT NULL
+);
+
+CREATE TABLE tournaments (
+    tournament_id TEXT PRIMARY KEY,
+    name          TEXT NOT NULL,
+    start_time    TIMESTAMPTZ NOT NULL,
+    org_id        TEXT,
+    tourn_id      TEXT,
+    year          TEXT,
+    is_finalized  BOOLEAN NOT NULL DEFAULT FALSE,
+    finalized_at  TIMESTAMPTZ,
+    earnings_recorded_at TIMESTAMPTZ
+);
+
+CREATE TABLE players (
+    player_id TEXT PRIMARY KEY,
+    name      TEXT NOT NULL,
+    name_last TEXT
+);
+
+CREATE TABLE tournament_tiers (
+    tournament_id TEXT NOT NULL,
+    tier_number   INTEGER NOT NULL,
+    player_id     TEXT NOT NULL
+);
+
+CREATE TABLE picks (
+    user_picks_id TEXT PRIMARY KEY,
+    username      TEXT NOT NULL,
+    tournament_id TEXT NOT NULL,
+    tier_number   INTEGER NOT NULL,
+    player_id     TEXT NOT NULL,
+    timestamp     TEXT
+);
+
+CREATE TABLE pick_scores (
+    pick_scores_id TEXT PRIMARY KEY,
+    tournament_id  TEXT NOT NULL,
+    username       TEXT NOT NULL,
+    tier_number    INTEGER NOT NULL,
+    player_id      TEXT NOT NULL,
+    points         INTEGER NOT NULL,
+    tier_winner    BOOLEAN NOT NULL,
+    missed_cut     BOOLEAN NOT NULL,
+    player_score   TEXT
+);
+
+CREATE TABLE tournament_scores (
+    tournament_scores_id TEXT PRIMARY KEY,
+    tournament_id        TEXT NOT NULL,
+    username             TEXT NOT NULL,
+    points               INTEGER NOT NULL,
+    money                BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE player_score_cache (
+    tournament_id TEXT NOT NULL,
+    player_id     TEXT NOT NULL,
+    player_name   TEXT,
+    position      TEXT,
+    score_to_par  TEXT,
+    status        TEXT,
+    earnings      BIGINT,
+    PRIMARY KEY (tournament_id, player_id)
+);
+
+CREATE TABLE research (
+    "Player"   TEXT PRIMARY KEY,
+    "Events"   INTEGER,
+    "SG Putt"  DOUBLE PRECISION,
+    "SG ARG"   DOUBLE PRECISION,
+    "SG APP"   DOUBLE PRECISION,
+    "SG OTT"   DOUBLE PRECISION,
+    "SG T2G"   DOUBLE PRECISION,
+    "SG Total" DOUBLE PRECISION,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE data_versions (
+    name       TEXT PRIMARY KEY,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+INSERT INTO data_versions (name) VALUES ('research'), ('players'), ('tiers');
+
+CREATE TABLE season_standings (
+    username   TEXT PRIMARY KEY,
+    points     INTEGER NOT NULL DEFAULT 0,
+    money      BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE leaderboard_history (
+    org_id       TEXT NOT NULL,
+    tourn_id     TEXT NOT NULL,
+    year         TEXT NOT NULL,
+    player_id    TEXT NOT NULL,
+    observed_at  TIMESTAMPTZ NOT NULL,
+    position     TEXT,
+    player_name  TEXT,
+    score_to_par TEXT,
+    status       TEXT,
+    removed      BOOLEAN NOT NULL DEFAULT FALSE,
+    PRIMARY KEY (org_id, tourn_id, year, player_id, observed_at)
+);
+CREATE INDEX leaderboard_history_event_time_idx ON leaderboard_history (org_id, tourn_id, year, observed_at);
+
+-- migrations/007
+CREATE INDEX picks_tournament_username_idx ON picks (tournament_id, username);
+CREATE INDEX tournament_tiers_tournament_tier_idx ON tournament_tiers (tournament_id, tier_number, player_id);
+CREATE INDEX pick_scores_tournament_username_idx ON pick_scores (tournament_id, username);
+CREATE INDEX tournament_scores_tournament_username_idx ON tournament_scores (tournament_id, username);
@@ -0,0 +1,151 @@
+"""
+Seed the local benchmark database with a synthetic league: a full season of
+weekly tournaments (all but the last two finalized, one live, one upcoming),
+a player field split into six tiers, every user's picks and scores, and the
+research table. Also writes recorded leaderboard snapshots for the live
+tournament so the app can replay them (utils.leaderboard_api.ReplayBackend).
+"""
+import json
+import random
+from pathlib import Path
+
+import bcrypt
+
+from utils.leaderboard_api import snapshot_dir
+
+SCHEMA = Path(__file__).with_name("schema.sql")
+
+ORG_ID = "1"
+YEAR = "2026"
+TIERS = 6
+ADMIN = "mj"
+
+
+def tourn_id(week):
+    return f"{week + 1:03d}"
+
+
+def seed(conn, users, field=150, weeks=20, snapshot_root=None, snapshots=8):
+    """
+    (Re)create the schema and load the league. Returns a summary dict with the
+    live tournament's ids. Week `weeks - 2` is live (started a day ago) and
+    week `weeks - 1` starts in six days.
+    """
+    live_week = weeks - 2
+    cur = conn.cursor()
+    cur.execute(SCHEMA.read_text())
+
+    password_hash = bcrypt.hashpw(b"password123", bcrypt.gensalt(4)).decode()
+    cur.execute("""
+        INSERT INTO users (username, name, password_hash)
+        SELECT 'user' || i, 'User ' || i, %(hash)s FROM generate_series(1, %(n)s - 1) i
+        UNION ALL SELECT %(admin)s, 'Mike', %(hash)s
+    """, {"n": users, "hash": password_hash, "admin": ADMIN})
+
+    cur.execute("""
+        INSERT INTO players (player_id, name, name_last)
+        SELECT i::text, 'First' || i || ' Last' || i, 'Last' || i
+        FROM generate_series(1, %s) i
+    """, (field,))
+
+    cur.execute("""
+        INSERT INTO tournaments (tournament_id, name, start_time, org_id, tourn_id, year, is_finalized, finalized_at)
+        SELECT 't' || lpad((w + 1)::text, 3, '0'),
+               'Tournament ' || (w + 1),
+               now() - interval '1 day' - interval '7 days' * (%(live)s - w),
+               %(org)s, lpad((w + 1)::text, 3, '0'), %(year)s,
+               w < %(live)s,
+               CASE WHEN w < %(live)s THEN now() - interval '7 days' * (%(live)s - w) END
+        FROM generate_series(0, %(weeks)s - 1) w
+    """, {"live": live_week, "weeks": weeks, "org": ORG_ID, "year": YEAR})
+
+    # Player i sits in tier ((i - 1) % 6) + 1 every week
+    cur.execute("""
+        INSERT INTO tournament_tiers (tournament_id, tier_number, player_id)
+        SELECT t.tournament_id, ((p.i - 1) %% %(tiers)s) + 1, p.i::text
+        FROM tournaments t, generate_series(1, %(field)s) AS p(i)
+    """, {"tiers": TIERS, "field": field})
+
+    # Each user picks a deterministic pseudo-random player from each tier
+    cur.execute("""
+        INSERT INTO picks (user_picks_id, username, tournament_id, tier_number, player_id, timestamp)
+        SELECT t.tournament_id || '_' || tier || '_' || u.username,
+               u.username, t.tournament_id, tier,
+               ((abs(hashtext(u.username || t.tournament_id || tier)) %% (%(field)s / %(tiers)s)) * %(tiers)s + tier)::text,
+               now()::text
+        FROM users u, tournaments t, generate_series(1, %(tiers)s) tier
+        WHERE t.start_time < now()
+    """, {"field": field, "tiers": TIERS})
+
+    cur.execute("""
+        INSERT INTO pick_scores
+            (pick_scores_id, tournament_id, username, tier_number, player_id,
+             points, tier_winner, missed_cut, player_score)
+        SELECT pk.tournament_id || '_' || pk.username || '_' || pk.tier_number,
+               pk.tournament_id, pk.username, pk.tier_number, pk.player_id,
+               (s.winner::int - s.cut::int), s.winner, s.cut,
+               CASE WHEN s.score > 0 THEN '+' || s.score ELSE s.score::text END
+        FROM picks pk
+        JOIN tournaments t ON t.tournament_id = pk.tournament_id AND t.is_finalized
+        CROSS JOIN LATERAL (
+            SELECT abs(hashtext(pk.player_id || pk.tournament_id)) % 20 - 10 AS score,
+                   abs(hashtext(pk.player_id || pk.tournament_id)) % 25 = 0 AS winner,
+                   abs(hashtext(pk.player_id || pk.tournament_id)) % 4 = 0 AS cut
+        ) s
+    """)
+
+    cur.execute("""
+        INSERT INTO tournament_scores (tournament_scores_id, tournament_id, username, points)
+        SELECT tournament_id || '_' || username, tournament_id, username, SUM(points)
+        FROM pick_scores
+        GROUP BY tournament_id, username
+    """)
+    cur.execute("""
+        INSERT INTO season_standings (username, points)
+        SELECT username, SUM(points) FROM tournament_scores GROUP BY username
+    """)
+
+    cur.execute("""
+        INSERT INTO research ("Player", "Events", "SG Putt", "SG ARG", "SG APP", "SG OTT", "SG T2G", "SG Total")
+        SELECT 'First' || i || ' Last' || i, 10 + i %% 15,
+               random() * 2 - 1,
+               random() * 2 - 1,
+               random() * 2 - 1,
+               random() * 2 - 1,
+               random() * 6 - 3,
+               random() * 8 - 4
+        FROM generate_series(1, %s) i
+    """, (field,))
+
+    conn.commit()
+
+    live = {"tournament_id": f"t{live_week + 1:03d}", "org_id": ORG_ID, "tourn_id": tourn_id(live_week), "year": YEAR}
+    if snapshot_root:
+        write_snapshots(snapshot_root, live, field, snapshots)
+    return live
+
+
+def write_snapshots(root, live, field, count):
+    """Write `count` in-progress leaderboard snapshots for the live tournament."""
+    rng = random.Random(live["tourn_id"])
+    folder = snapshot_dir(root, live["org_id"], live["tourn_id"], live["year"])
+    folder.mkdir(parents=True, exist_ok=True)
+
+    totals = {pid: 0 for pid in range(1, field + 1)}
+    for n in range(count):
+        for pid in totals:
+            totals[pid] += rng.randint(-2, 2)
+        ranked = sorted(totals, key=totals.get)
+        cut_line = count // 2
+        rows = [
+            {
+                "playerId": str(pid),
+                "position": str(pos + 1),
+                "firstName": f"First{pid}",
+                "lastName": f"Last{pid}",
+                "total": "E" if totals[pid] == 0 else f"{totals[pid]:+d}",
+                "status": "cut" if n >= cut_line and pos >= 70 else "active",
+            }
+            for pos, pid in enumerate(ranked)
+        ]
+        (folder / f"{n:04d}.json").write_text(json.dumps({"leaderboardRows": rows}))
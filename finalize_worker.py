@@ -0,0 +1,52 @@
+"""
+Finalize completed tournaments outside the Streamlit app.
+
+    python finalize_worker.py               # single pass (cron / scheduled job)
+    python finalize_worker.py --loop 900    # keep running, pass every 15 minutes
+
+Reads SUPABASE_DB_URL and RAPIDAPI_KEY from the environment, falling back to
+.streamlit/secrets.toml.
+"""
+import argparse
+import time
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from utils.config import load_secret
+from utils.finalize import finalize_due_tournaments
+
+
+def run_once(dsn, api_key):
+    conn = psycopg2.connect(dsn, sslmode="require", cursor_factory=RealDictCursor)
+    try:
+        cursor = conn.cursor()
+        for ok, msg in finalize_due_tournaments(conn, cursor, api_key):
+            print(("OK    " if ok else "FAIL  ") + msg, flush=True)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Finalize completed tournaments.")
+    parser.add_argument("--loop", type=int, metavar="SECONDS",
+                        help="repeat every SECONDS instead of running once")
+    args = parser.parse_args()
+
+    dsn = load_secret("SUPABASE_DB_URL")
+    api_key = load_secret("RAPIDAPI_KEY")
+
+    while True:
+        try:
+            run_once(dsn, api_key)
+        except psycopg2.Error as e:
+            if not args.loop:
+                raise
+            print(f"FAIL  database error: {e}", flush=True)
+        if not args.loop:
+            break
+        time.sleep(args.loop)
+
+
+if __name__ == "__main__":
+    main()
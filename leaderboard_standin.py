@@ -0,0 +1,88 @@
+"""
+Local stand-in for the RapidAPI live-golf-data /leaderboard and /earnings
+endpoints, serving recorded snapshots and earnings (see
+utils.leaderboard_api.ReplayBackend) over HTTP.
+
+    python leaderboard_standin.py --root snapshots --port 8765 --latency 300 --error-rate 0.05
+
+Then point the app or worker at it:
+
+    LEADERBOARD_BASE_URL=http://localhost:8765 streamlit run app.py
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from utils.leaderboard_api import ReplayBackend
+
+
+def make_handler(backend, latency_ms, jitter_ms, error_rate, error_status):
+    endpoints = {
+        "/leaderboard": backend.fetch,
+        "/earnings": backend.fetch_earnings,
+    }
+
+    class LeaderboardHandler(BaseHTTPRequestHandler):
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            fetch = endpoints.get(url.path.rstrip("/"))
+            if fetch is None:
+                self._send(404, {"message": f"Unknown endpoint {url.path}"})
+                return
+
+            delay = latency_ms + random.uniform(0, jitter_ms)
+            time.sleep(delay / 1000)
+
+            if random.random() < error_rate:
+                self._send(error_status, {"message": "Injected error"})
+                return
+
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            try:
+                data = fetch(None, params.get("orgId"), params.get("tournId"), params.get("year"))
+            except RuntimeError as e:
+                self._send(404, {"message": str(e)})
+                return
+            self._send(200, data)
+
+    return LeaderboardHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded leaderboards and earnings on /leaderboard and /earnings.")
+    parser.add_argument("--root", required=True, help="snapshot root (<orgId>-<tournId>-<year>/*.json)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--step", type=float, help="seconds per snapshot (default: advance on each request)")
+    parser.add_argument("--latency", type=float, default=0, help="base response latency in ms")
+    parser.add_argument("--jitter", type=float, default=0, help="extra random latency in ms")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status for injected errors")
+    args = parser.parse_args()
+
+    handler = make_handler(
+        ReplayBackend(args.root, step=args.step),
+        args.latency, args.jitter, args.error_rate, args.error_status
+    )
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Serving {args.root} on http://{args.host}:{args.port}/leaderboard and /earnings", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Load a strokes-gained file into the research table.
+
+    python load_research.py sg_last_6_months.csv
+    python load_research.py sg_last_6_months.parquet --prune
+
+The file is COPYed into a temporary staging table, then upserted so only
+players whose numbers changed are written (and, with --prune, players no
+longer in the file are removed). Readers are never blocked: only the changed
+rows are locked, and only for the one short transaction. The research
+version stamp is bumped in the same transaction so the app's cache reloads.
+
+Reads SUPABASE_DB_URL from the environment, falling back to
+.streamlit/secrets.toml.
+"""
+import argparse
+import io
+import re
+from pathlib import Path
+
+import pandas as pd
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from utils.config import load_secret
+
+METRIC_COLUMNS = ["SG Putt", "SG ARG", "SG APP", "SG OTT", "SG T2G", "SG Total"]
+COLUMNS = ["Player", "Events"] + METRIC_COLUMNS
+
+
+def _normalize(name):
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+def read_research_file(path):
+    """Read a CSV/Parquet file into a typed frame with the research columns."""
+    path = Path(path)
+    if path.suffix.lower() in (".parquet", ".pq"):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+
+    # Accept "SG Putt", "sg_putt", "SGPutt", ...
+    by_key = {_normalize(c): c for c in df.columns}
+    missing = [c for c in COLUMNS if _normalize(c) not in by_key]
+    if missing:
+        raise SystemExit(f"{path.name} is missing columns: {', '.join(missing)}")
+    df = df[[by_key[_normalize(c)] for c in COLUMNS]]
+    df.columns = COLUMNS
+
+    df["Player"] = df["Player"].astype(str).str.strip()
+    df = df[df["Player"] != ""].drop_duplicates("Player", keep="last")
+    df["Events"] = pd.to_numeric(df["Events"], errors="coerce").round().astype("Int64")
+    for c in METRIC_COLUMNS:
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+    return df
+
+
+def load(conn, df, prune=False):
+    """Stage and upsert `df`. Returns (inserted, updated, deleted)."""
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, header=False, na_rep="")
+    buf.seek(0)
+
+    cols = ", ".join(f'"{c}"' for c in COLUMNS)
+    changed = " OR ".join(f'research."{c}" IS DISTINCT FROM EXCLUDED."{c}"' for c in COLUMNS[1:])
+
+    cur = conn.cursor()
+    cur.execute(f"""
+        CREATE TEMP TABLE research_staging ON COMMIT DROP AS
+        SELECT {cols} FROM research WITH NO DATA
+    """)
+    cur.copy_expert(f"COPY research_staging ({cols}) FROM STDIN WITH (FORMAT csv, NULL '')", buf)
+
+    cur.execute(f"""
+        INSERT INTO research ({cols}, updated_at)
+        SELECT {cols}, now() FROM research_staging
+        ON CONFLICT ("Player") DO UPDATE SET
+            {", ".join(f'"{c}" = EXCLUDED."{c}"' for c in COLUMNS[1:])},
+            updated_at = now()
+        WHERE {changed}
+        RETURNING (xmax = 0) AS inserted
+    """)
+    written = [r["inserted"] for r in cur.fetchall()]
+    inserted = sum(written)
+    updated = len(written) - inserted
+
+    deleted = 0
+    if prune:
+        cur.execute("""
+            DELETE FROM research r
+            WHERE NOT EXISTS (SELECT 1 FROM research_staging s WHERE s."Player" = r."Player")
+        """)
+        deleted = cur.rowcount
+
+    if inserted or updated or deleted:
+        cur.execute("""
+            INSERT INTO data_versions (name, updated_at) VALUES ('research', now())
+            ON CONFLICT (name) DO UPDATE SET updated_at = EXCLUDED.updated_at
+        """)
+
+    conn.commit()
+    return inserted, updated, deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load strokes-gained data into research.")
+    parser.add_argument("path", help="CSV or Parquet file")
+    parser.add_argument("--prune", action="store_true", help="delete players not present in the file")
+    args = parser.parse_args()
+
+    df = read_research_file(args.path)
+    conn = psycopg2.connect(load_secret("SUPABASE_DB_URL"), sslmode="require", cursor_factory=RealDictCursor)
+    try:
+        inserted, updated, deleted = load(conn, df, prune=args.prune)
+    finally:
+        conn.close()
+    print(f"{len(df)} players read: {inserted} inserted, {updated} updated, {deleted} deleted", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+-- Season standings, maintained incrementally by finalize_tournament
+-- (utils/finalize.py) so the sidebar never re-sums tournament_scores.
+--
+--   psql "$SUPABASE_DB_URL" -f migrations/001_season_standings.sql
+
+CREATE TABLE IF NOT EXISTS season_standings (
+    username   TEXT PRIMARY KEY,
+    points     INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Backfill from existing weekly scores
+INSERT INTO season_standings (username, points)
+SELECT username, COALESCE(SUM(points), 0)
+FROM tournament_scores
+GROUP BY username
+ON CONFLICT (username) DO UPDATE SET
+    points = EXCLUDED.points,
+    updated_at = now();
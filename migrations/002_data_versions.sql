@@ -0,0 +1,12 @@
+-- Version stamps for slowly-changing datasets the app caches in memory.
+-- Bump a row (utils.db.bump_data_version) to invalidate caches.
+--
+--   psql "$SUPABASE_DB_URL" -f migrations/002_data_versions.sql
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    name       TEXT PRIMARY KEY,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO data_versions (name) VALUES ('research')
+ON CONFLICT (name) DO NOTHING;
@@ -0,0 +1,28 @@
+-- Type the research table's metrics so the app no longer coerces them, key it
+-- by player for load_research.py's diff-based upserts, and track row changes.
+--
+--   psql "$SUPABASE_DB_URL" -f migrations/003_research_typed_columns.sql
+
+BEGIN;
+
+ALTER TABLE research
+    ALTER COLUMN "Events"   TYPE INTEGER
+        USING CASE WHEN "Events"::text ~ '^\s*-?\d+(\.0*)?\s*$' THEN round("Events"::text::numeric)::integer END,
+    ALTER COLUMN "SG Putt"  TYPE DOUBLE PRECISION
+        USING CASE WHEN "SG Putt"::text ~ '^\s*-?\d*\.?\d+\s*$' THEN "SG Putt"::text::double precision END,
+    ALTER COLUMN "SG ARG"   TYPE DOUBLE PRECISION
+        USING CASE WHEN "SG ARG"::text ~ '^\s*-?\d*\.?\d+\s*$' THEN "SG ARG"::text::double precision END,
+    ALTER COLUMN "SG APP"   TYPE DOUBLE PRECISION
+        USING CASE WHEN "SG APP"::text ~ '^\s*-?\d*\.?\d+\s*$' THEN "SG APP"::text::double precision END,
+    ALTER COLUMN "SG OTT"   TYPE DOUBLE PRECISION
+        USING CASE WHEN "SG OTT"::text ~ '^\s*-?\d*\.?\d+\s*$' THEN "SG OTT"::text::double precision END,
+    ALTER COLUMN "SG T2G"   TYPE DOUBLE PRECISION
+        USING CASE WHEN "SG T2G"::text ~ '^\s*-?\d*\.?\d+\s*$' THEN "SG T2G"::text::double precision END,
+    ALTER COLUMN "SG Total" TYPE DOUBLE PRECISION
+        USING CASE WHEN "SG Total"::text ~ '^\s*-?\d*\.?\d+\s*$' THEN "SG Total"::text::double precision END,
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+-- load_research.py upserts ON CONFLICT ("Player")
+CREATE UNIQUE INDEX IF NOT EXISTS research_player_key ON research ("Player");
+
+COMMIT;
@@ -0,0 +1,19 @@
+-- Version the player catalog so the Admin page can cache it; any write to
+-- players bumps the stamp, however the rows got there.
+--
+--   psql "$SUPABASE_DB_URL" -f migrations/004_players_version.sql
+
+INSERT INTO data_versions (name) VALUES ('players')
+ON CONFLICT (name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_players_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE data_versions SET updated_at = now() WHERE name = 'players';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS players_version ON players;
+CREATE TRIGGER players_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON players
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_players_version();
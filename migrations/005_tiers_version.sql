@@ -0,0 +1,19 @@
+-- Version tournament tiers so Make Picks can cache each tournament's tier
+-- roster across users; any write to tournament_tiers bumps the stamp.
+--
+--   psql "$SUPABASE_DB_URL" -f migrations/005_tiers_version.sql
+
+INSERT INTO data_versions (name) VALUES ('tiers')
+ON CONFLICT (name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_tiers_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE data_versions SET updated_at = now() WHERE name = 'tiers';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tiers_version ON tournament_tiers;
+CREATE TRIGGER tiers_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tournament_tiers
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_tiers_version();
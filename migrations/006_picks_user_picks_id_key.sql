@@ -0,0 +1,6 @@
+-- Save Picks upserts ON CONFLICT (user_picks_id) (_pages/make_picks.save_picks),
+-- which needs a unique index. A no-op where user_picks_id is already the key.
+--
+--   psql "$SUPABASE_DB_URL" -f migrations/006_picks_user_picks_id_key.sql
+
+CREATE UNIQUE INDEX IF NOT EXISTS picks_user_picks_id_key ON picks (user_picks_id);
@@ -0,0 +1,39 @@
+-- Store player_id as TEXT everywhere (the leaderboard API's ids are strings)
+-- so joins compare like types and can use indexes instead of
+-- CAST(... AS TEXT) on both sides, then add the indexes the app's queries
+-- need. Check the plans afterwards with `python -m benchmarks.explain`.
+--
+--   psql "$SUPABASE_DB_URL" -f migrations/007_player_id_text_and_indexes.sql
+
+DO $$
+DECLARE
+    col record;
+BEGIN
+    FOR col IN
+        SELECT table_name
+        FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND column_name = 'player_id'
+          AND table_name IN ('players', 'tournament_tiers', 'picks', 'pick_scores', 'player_score_cache')
+          AND data_type <> 'text'
+    LOOP
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN player_id TYPE TEXT USING player_id::text', col.table_name);
+    END LOOP;
+END;
+$$;
+
+-- Make Picks: the user's picks for a tournament; This Week: everyone's
+CREATE INDEX IF NOT EXISTS picks_tournament_username_idx
+    ON picks (tournament_id, username);
+
+-- Make Picks roster, This Week tier lookup, Admin tier diff
+CREATE INDEX IF NOT EXISTS tournament_tiers_tournament_tier_idx
+    ON tournament_tiers (tournament_id, tier_number, player_id);
+
+-- Results tables and finalization
+CREATE INDEX IF NOT EXISTS pick_scores_tournament_username_idx
+    ON pick_scores (tournament_id, username);
+CREATE INDEX IF NOT EXISTS tournament_scores_tournament_username_idx
+    ON tournament_scores (tournament_id, username);
+
+ANALYZE players, tournament_tiers, picks, pick_scores, tournament_scores;
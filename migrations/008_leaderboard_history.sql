@@ -0,0 +1,23 @@
+-- Leaderboard history recorded from the live poller (utils/leaderboard_history.py):
+-- one row per player per change, so the state at any time is the latest row
+-- per player at or before it.
+--
+--   psql "$SUPABASE_DB_URL" -f migrations/008_leaderboard_history.sql
+
+CREATE TABLE IF NOT EXISTS leaderboard_history (
+    org_id       TEXT NOT NULL,
+    tourn_id     TEXT NOT NULL,
+    year         TEXT NOT NULL,
+    player_id    TEXT NOT NULL,
+    observed_at  TIMESTAMPTZ NOT NULL,
+    position     TEXT,
+    player_name  TEXT,
+    score_to_par TEXT,
+    status       TEXT,
+    removed      BOOLEAN NOT NULL DEFAULT FALSE,
+    PRIMARY KEY (org_id, tourn_id, year, player_id, observed_at)
+);
+
+-- Whole-event reads (trajectories, replay export) in time order
+CREATE INDEX IF NOT EXISTS leaderboard_history_event_time_idx
+    ON leaderboard_history (org_id, tourn_id, year, observed_at);
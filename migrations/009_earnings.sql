@@ -0,0 +1,10 @@
+-- Tournament earnings, fetched once at finalization (utils/finalize.py
+-- record_earnings), and money totals for the "money" scoring mode.
+-- season_standings.money is accumulated incrementally like points.
+--
+--   psql "$SUPABASE_DB_URL" -f migrations/009_earnings.sql
+
+ALTER TABLE player_score_cache ADD COLUMN IF NOT EXISTS earnings BIGINT;
+ALTER TABLE tournament_scores  ADD COLUMN IF NOT EXISTS money BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE season_standings   ADD COLUMN IF NOT EXISTS money BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE tournaments        ADD COLUMN IF NOT EXISTS earnings_recorded_at TIMESTAMPTZ;
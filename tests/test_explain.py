@@ -0,0 +1,27 @@
+"""
+The app's hot queries reach every table through an index (see
+benchmarks/explain.py). Needs a database with the schema and some data:
+
+    BENCH_DB_URL=postgresql://postgres@localhost/ylpicks_bench python -m pytest tests
+"""
+import os
+
+import pytest
+
+from benchmarks.explain import QUERIES, connect, missing_indexes
+
+pytestmark = pytest.mark.skipif(not os.environ.get("BENCH_DB_URL"), reason="BENCH_DB_URL is not set")
+
+
+@pytest.fixture(scope="module")
+def missing():
+    conn = connect(os.environ["BENCH_DB_URL"])
+    try:
+        yield missing_indexes(conn)
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("name", list(QUERIES))
+def test_query_uses_indexes(missing, name):
+    assert missing[name] == [], f"{name} reads {', '.join(missing[name])} without an index condition"
@@ -0,0 +1,77 @@
+"""
+This Week must run a fixed number of queries however many users the league
+has (no per-user SELECTs in the picks grid).
+
+    python -m pytest tests
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+import _pages.this_week as this_week
+from utils.leaderboard_api import leaderboard_to_df
+from utils.live_poller import LiveSnapshot
+
+
+class CountingCursor:
+    """Just enough of a RealDictCursor for this_week.show(), counting execute() calls."""
+
+    def __init__(self, n_users):
+        self.executes = 0
+        self.result = []
+        self.tournament = {
+            "tournament_id": "t1", "name": "Test Open", "org_id": "1", "tourn_id": "100", "year": "2026",
+            "start_time": datetime.now(timezone.utc) - timedelta(days=1),
+        }
+        self.users = [{"username": f"u{i}", "name": f"User {i}"} for i in range(n_users)]
+        self.picks = [
+            {"username": u["username"], "tier_number": tier, "player_id": str(tier), "name_last": f"Player{tier}"}
+            for u in self.users for tier in range(1, 7)
+        ]
+
+    def execute(self, sql, params=None):
+        self.executes += 1
+        if "FROM tournaments" in sql:
+            self.result = [self.tournament]
+        elif "FROM users" in sql:
+            self.result = self.users
+        elif "FROM picks" in sql:
+            self.result = self.picks
+        elif "FROM tournament_tiers" in sql:
+            self.result = [{"player_id": str(tier), "tier_number": tier} for tier in range(1, 7)]
+        else:
+            self.result = []
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return list(self.result)
+
+
+@pytest.fixture
+def live_board(monkeypatch):
+    board = leaderboard_to_df([
+        {"playerId": str(tier), "position": str(tier), "firstName": "Player", "lastName": str(tier),
+         "total": f"-{tier}", "status": "active"}
+        for tier in range(1, 7)
+    ])
+    snapshot = LiveSnapshot(1, time.time(), board, board, [])
+    monkeypatch.setattr(this_week, "get_pool", lambda: None)
+    monkeypatch.setattr(this_week, "install_recorder", lambda pool: None)
+    monkeypatch.setattr(this_week, "live_snapshot", lambda *key: snapshot)
+    monkeypatch.setattr(this_week, "watch_leaderboard", lambda *args: None)
+
+
+def count_queries(n_users):
+    this_week.load_team_trajectories.clear()
+    cursor = CountingCursor(n_users)
+    this_week.show(None, cursor, "key")
+    return cursor.executes
+
+
+def test_query_count_independent_of_users(live_board):
+    assert count_queries(2) == count_queries(50)
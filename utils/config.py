@@ -0,0 +1,21 @@
+import os
+import tomllib
+from pathlib import Path
+
+
+# ----------------------------
+# Secrets outside Streamlit
+# ----------------------------
+# Command-line scripts (finalize_worker.py, load_research.py, benchmarks) read
+# the same settings as the app without st.secrets: the environment first,
+# then .streamlit/secrets.toml at the repository root.
+
+SECRETS_PATH = Path(__file__).resolve().parent.parent / ".streamlit" / "secrets.toml"
+
+
+def load_secret(key):
+    """The value of `key` from the environment, falling back to SECRETS_PATH."""
+    if os.environ.get(key):
+        return os.environ[key]
+    with open(SECRETS_PATH, "rb") as f:
+        return tomllib.load(f)[key]
@@ -1,16 +1,315 @@
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
 import streamlit as st
 import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+from psycopg2 import pool as pg_pool
 from psycopg2.extras import RealDictCursor
 
 
-def get_connection():
-    try:
+# ----------------------------
+# Pool settings (overridable in secrets.toml)
+# ----------------------------
+DEFAULT_POOL_MIN = 1
+DEFAULT_POOL_MAX = 10
+DEFAULT_MAX_LIFETIME = 30 * 60      # recycle connections older than this (seconds)
+DEFAULT_HEALTH_CHECK_AFTER = 30     # ping connections idle longer than this (seconds)
+DEFAULT_POOL_TIMEOUT = 10           # wait this long for a free connection (seconds)
+
+_SESSION_KEY = "_db_conn"
+
+
+# ----------------------------
+# Statement counters
+# ----------------------------
+class StatementStats:
+    """
+    Process-wide counters for statements executed and rows fetched through
+    InstrumentedCursor. Result sizes are only estimated when track_bytes is on
+    (benchmarks/run.py), since that walks every fetched value.
+    """
+
+    def __init__(self):
+        self.track_bytes = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.statements = 0
+            self.rows = 0
+            self.bytes = 0
+
+    def record_statement(self):
+        with self._lock:
+            self.statements += 1
+
+    def record_rows(self, rows):
+        nbytes = sum(len(str(v)) for row in rows for v in row.values()) if self.track_bytes else 0
+        with self._lock:
+            self.rows += len(rows)
+            self.bytes += nbytes
+
+    def snapshot(self):
+        with self._lock:
+            return {"statements": self.statements, "rows": self.rows, "bytes": self.bytes}
+
+
+statement_stats = StatementStats()
+
+
+# ----------------------------
+# Per-rerun query log
+# ----------------------------
+DEFAULT_SLOW_QUERY_MS = 200
+RECENT_RERUNS = 50
+RECENT_SLOW_QUERIES = 100
+
+logger = logging.getLogger("ylpicks.sql")
+
+# Frames in these files are skipped when attributing a statement to a call-site
+_INTERNAL_FILES = (__file__, psycopg2.extras.__file__)
+
+rerun_history = deque(maxlen=RECENT_RERUNS)        # newest first, one summary per rerun
+slow_queries = deque(maxlen=RECENT_SLOW_QUERIES)   # newest first
+
+
+def _call_site():
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_filename in _INTERNAL_FILES:
+        frame = frame.f_back
+    if frame is None:
+        return "?", "?"
+    page = Path(frame.f_code.co_filename).stem
+    return page, f"{page}.{frame.f_code.co_name}:{frame.f_lineno}"
+
+
+class QueryLog:
+    """Statements executed on one leased connection during one rerun."""
+
+    def __init__(self, slow_query_ms=DEFAULT_SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self.started = datetime.now(timezone.utc)
+        self.records = []
+
+    def add(self, query, ms, rows):
+        page, site = _call_site()
+        sql = " ".join(str(query).split())
+        record = {"sql": sql, "ms": round(ms, 2), "rows": rows, "page": page, "site": site}
+        self.records.append(record)
+        if ms >= self.slow_query_ms:
+            slow_queries.appendleft(dict(record, at=datetime.now(timezone.utc)))
+            logger.warning("slow query %.0f ms at %s (%s rows): %.200s", ms, site, rows, sql)
+
+    def summary(self, label=None):
+        return {
+            "at": self.started,
+            "label": label or "(interrupted)",
+            "statements": len(self.records),
+            "ms": round(sum(r["ms"] for r in self.records), 2),
+            "rows": sum(max(r["rows"], 0) for r in self.records),
+            "records": list(self.records),
+        }
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    query_log = None
+
+
+class InstrumentedCursor(RealDictCursor):
+    """Times every statement and records it on the connection's QueryLog."""
+
+    def execute(self, query, vars=None):
+        statement_stats.record_statement()
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            log = getattr(self.connection, "query_log", None)
+            if log is not None:
+                log.add(query, (time.perf_counter() - started) * 1000, self.rowcount)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            statement_stats.record_rows([row])
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(size) if size is not None else super().fetchmany()
+        statement_stats.record_rows(rows)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        statement_stats.record_rows(rows)
+        return rows
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of Supabase connections shared by every session.
+    Opens minconn connections up front and keeps every returned connection
+    idle for reuse, up to maxconn in total. Connections are recycled after
+    max_lifetime seconds and pinged before reuse if they sat idle longer than
+    health_check_after seconds. When all maxconn are leased, getconn waits up
+    to `timeout` seconds for one.
+    """
+
+    def __init__(self, dsn, minconn, maxconn, max_lifetime, health_check_after, sslmode="require",
+                 timeout=DEFAULT_POOL_TIMEOUT):
+        self.dsn = dsn
+        self.sslmode = sslmode
+        self.maxconn = maxconn
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        # One slot per leased connection. A connection is only opened when no
+        # idle one is left, so leased + idle never exceeds maxconn.
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._idle = []                 # most recently returned last
+        self._lock = threading.Lock()
+        for _ in range(min(minconn, maxconn)):
+            self._idle.append(self._connect())
+
+    def _connect(self):
         conn = psycopg2.connect(
-            st.secrets["SUPABASE_DB_URL"],
-            sslmode="require",
-            cursor_factory=RealDictCursor
+            self.dsn,
+            sslmode=self.sslmode,
+            connection_factory=InstrumentedConnection,
+            cursor_factory=InstrumentedCursor
         )
+        conn.pool_created = conn.pool_returned = time.monotonic()
+        return conn
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        now = time.monotonic()
+        if now - conn.pool_created > self.max_lifetime:
+            return False
+        if now - conn.pool_returned > self.health_check_after:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise pg_pool.PoolError(f"no connection free after {self.timeout:g}s")
+        try:
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    return self._connect()
+                if self._is_healthy(conn):
+                    return conn
+                self._close(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn):
+        try:
+            if conn.closed:
+                return
+            status = conn.info.transaction_status
+            if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                self._close(conn)
+                return
+            if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            conn.pool_returned = time.monotonic()
+            with self._lock:
+                self._idle.append(conn)
+        except psycopg2.Error:
+            self._close(conn)
+        finally:
+            self._slots.release()
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+
+@st.cache_resource(show_spinner=False)
+def get_pool():
+    return ConnectionPool(
+        st.secrets["SUPABASE_DB_URL"],
+        minconn=int(st.secrets.get("DB_POOL_MIN", DEFAULT_POOL_MIN)),
+        maxconn=int(st.secrets.get("DB_POOL_MAX", DEFAULT_POOL_MAX)),
+        max_lifetime=float(st.secrets.get("DB_POOL_MAX_LIFETIME", DEFAULT_MAX_LIFETIME)),
+        health_check_after=float(st.secrets.get("DB_POOL_HEALTH_CHECK_AFTER", DEFAULT_HEALTH_CHECK_AFTER)),
+        sslmode=st.secrets.get("DB_SSLMODE", "require"),
+        timeout=float(st.secrets.get("DB_POOL_TIMEOUT", DEFAULT_POOL_TIMEOUT)),
+    )
+
+
+def get_connection():
+    """
+    Lease a pooled connection for this rerun. A connection still held from a
+    rerun that ended early (st.stop / st.rerun) is returned to the pool first.
+    """
+    try:
+        db_pool = get_pool()
+        release_connection()
+        conn = db_pool.getconn()
+        conn.query_log = QueryLog(float(st.secrets.get("DB_SLOW_QUERY_MS", DEFAULT_SLOW_QUERY_MS)))
+        st.session_state[_SESSION_KEY] = conn
         return conn
     except Exception as e:
         st.error(f"Failed to connect to Supabase: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def release_connection(conn=None, label=None):
+    """
+    Return this session's leased connection to the pool, filing its query log
+    in rerun_history under `label` (usually the page that was rendered).
+    """
+    held = st.session_state.pop(_SESSION_KEY, None)
+    conn = conn or held
+    if conn is not None:
+        log = getattr(conn, "query_log", None)
+        if log is not None:
+            rerun_history.appendleft(log.summary(label))
+            conn.query_log = None
+        get_pool().putconn(conn)
+
+
+# ----------------------------
+# Data version stamps
+# ----------------------------
+# Slowly-changing datasets (research, players) are cached per version stamp
+# from data_versions. The stamp is re-read at most every DATA_VERSION_TTL
+# seconds; bump_data_version() moves it on immediately.
+DATA_VERSION_TTL = 10 * 60
+
+
+@st.cache_data(ttl=DATA_VERSION_TTL, show_spinner=False)
+def data_version(_cursor, name):
+    _cursor.execute("SELECT updated_at FROM data_versions WHERE name = %s", (name,))
+    row = _cursor.fetchone()
+    return row["updated_at"] if row else None
+
+
+def bump_data_version(conn, cursor, name):
+    cursor.execute("""
+        INSERT INTO data_versions (name, updated_at) VALUES (%s, now())
+        ON CONFLICT (name) DO UPDATE SET updated_at = EXCLUDED.updated_at
+    """, (name,))
+    conn.commit()
+    data_version.clear()
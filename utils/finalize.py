@@ -0,0 +1,310 @@
+from datetime import datetime, timezone
+from psycopg2.extras import execute_values
+
+from utils.leaderboard_api import get_live_leaderboard, get_tournament_earnings
+from utils.scoring import player_scores, score_picks
+
+# Namespace for pg advisory locks taken while finalizing (key 2 = hashtext(tournament_id))
+FINALIZE_LOCK_NS = 7301
+
+# Earnings that haven't posted this many days after finalization are given up
+# on, so tournaments from before migrations/009 (or whose money never posts)
+# aren't fetched again on every worker pass
+EARNINGS_RETRY_DAYS = 14
+
+
+def finalize_tournament(conn, cursor, tournament, api_key):
+    """
+    Score a completed tournament and write results to the DB.
+    Uses player_score_cache as a cache so the API is only hit once.
+    Holds an advisory lock on the tournament so the worker and the admin
+    button never finalize it twice. Returns (success: bool, message: str).
+    """
+    tournament_id = tournament["tournament_id"]
+
+    cursor.execute(
+        "SELECT pg_try_advisory_lock(%s, hashtext(%s)) AS locked",
+        (FINALIZE_LOCK_NS, tournament_id)
+    )
+    if not cursor.fetchone()["locked"]:
+        conn.rollback()
+        return False, f"{tournament_id} is already being finalized."
+
+    try:
+        cursor.execute("SELECT is_finalized FROM tournaments WHERE tournament_id = %s", (tournament_id,))
+        row = cursor.fetchone()
+        if row and row["is_finalized"]:
+            conn.rollback()
+            return True, f"{tournament['name']} was already finalized."
+        return _finalize(conn, cursor, tournament, api_key)
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(%s, hashtext(%s))", (FINALIZE_LOCK_NS, tournament_id))
+        conn.commit()
+
+
+def _finalize(conn, cursor, tournament, api_key):
+    tournament_id = tournament["tournament_id"]
+    org_id = tournament.get("org_id") or "1"
+    tourn_id = tournament.get("tourn_id")
+    year = tournament.get("year") or "2026"
+
+    if not tourn_id:
+        return False, f"No tourn_id set for {tournament_id} — update tournaments first."
+
+    try:
+        # --- Step 1: Fetch & cache leaderboard if not already cached ---
+        cursor.execute(
+            "SELECT player_id, player_name, score_to_par, status FROM player_score_cache WHERE tournament_id = %s",
+            (tournament_id,)
+        )
+        cached_rows = cursor.fetchall()
+
+        if not cached_rows:
+            # Always a fresh fetch: a cached or fallback board would be written for good
+            leaderboard = get_live_leaderboard(api_key, org_id, tourn_id, year, ttl=0)
+            if leaderboard.empty:
+                return False, f"API returned empty leaderboard for {tournament_id}."
+
+            # Typed string columns (leaderboard_to_df); missing values go in as NULL
+            cache_df = leaderboard[["PlayerID", "Player", "Pos", "Score", "Status"]].astype(object)
+            cache_df = cache_df.where(cache_df.notna(), None)
+            cache_rows = [
+                (tournament_id, pid, player, pos, score, str(status).lower())
+                for pid, player, pos, score, status in cache_df.itertuples(index=False, name=None)
+            ]
+            cached_rows = execute_values(cursor, """
+                INSERT INTO player_score_cache
+                    (tournament_id, player_id, player_name, position, score_to_par, status)
+                VALUES %s
+                ON CONFLICT (tournament_id, player_id) DO NOTHING
+                RETURNING player_id, player_name, score_to_par, status
+            """, cache_rows, fetch=True, page_size=len(cache_rows))
+            conn.commit()
+
+        # --- Step 2: Build the player score table from cache ---
+        scores = player_scores(
+            [r["player_id"] for r in cached_rows],
+            [r["score_to_par"] for r in cached_rows],
+            [r["status"] for r in cached_rows],
+        )
+
+        # --- Step 3: Get picks ---
+        cursor.execute("""
+            SELECT username, tier_number, player_id
+            FROM picks WHERE tournament_id = %s
+        """, (tournament_id,))
+        all_picks = cursor.fetchall()
+
+        # --- Step 4/5: Tier winners, cuts and team scores (see utils.scoring) ---
+        pick_df, team_df = score_picks(
+            [(p["username"], p["tier_number"], p["player_id"]) for p in all_picks],
+            scores
+        )
+        bonus_users = team_df.index[team_df["best_team"]].tolist()
+
+        # --- Step 6: Batch-upsert pick_scores ---
+        pick_score_rows = [
+            (f"{tournament_id}_{uname}_{tier_number}", tournament_id, uname, int(tier_number),
+             player_id, int(points), bool(winner), bool(cut), score_text)
+            for uname, tier_number, player_id, points, winner, cut, score_text in zip(
+                pick_df["username"], pick_df["tier_number"], pick_df["player_id"],
+                pick_df["points"], pick_df["tier_winner"], pick_df["missed_cut"],
+                pick_df["score_text"],
+            )
+        ]
+
+        if pick_score_rows:
+            execute_values(cursor, """
+                INSERT INTO pick_scores
+                    (pick_scores_id, tournament_id, username, tier_number,
+                     player_id, points, tier_winner, missed_cut, player_score)
+                VALUES %s
+                ON CONFLICT (pick_scores_id) DO UPDATE SET
+                    points = EXCLUDED.points,
+                    tier_winner = EXCLUDED.tier_winner,
+                    missed_cut = EXCLUDED.missed_cut,
+                    player_score = EXCLUDED.player_score
+            """, pick_score_rows, page_size=len(pick_score_rows))
+
+        # --- Step 7: Write tournament_scores (tier points + best-overall bonus) in one aggregate,
+        #             and apply the change to season_standings incrementally ---
+        cursor.execute("""
+            WITH previous AS (
+                SELECT username, points
+                FROM tournament_scores
+                WHERE tournament_id = %(tid)s
+            ),
+            upserted AS (
+                INSERT INTO tournament_scores (tournament_id, username, points, tournament_scores_id)
+                SELECT %(tid)s,
+                       u.username,
+                       COALESCE(SUM(ps.points), 0)
+                           + CASE WHEN u.username = ANY(%(bonus)s) THEN 1 ELSE 0 END,
+                       %(tid)s || '_' || u.username
+                FROM users u
+                LEFT JOIN pick_scores ps
+                  ON ps.username = u.username AND ps.tournament_id = %(tid)s
+                GROUP BY u.username
+                ON CONFLICT (tournament_scores_id) DO UPDATE SET points = EXCLUDED.points
+                RETURNING username, points
+            )
+            INSERT INTO season_standings (username, points)
+            SELECT up.username, up.points - COALESCE(prev.points, 0)
+            FROM upserted up
+            LEFT JOIN previous prev ON prev.username = up.username
+            ON CONFLICT (username) DO UPDATE SET
+                points = season_standings.points + EXCLUDED.points,
+                updated_at = now()
+        """, {"tid": tournament_id, "bonus": bonus_users})
+
+        # --- Step 8: Earnings and money totals. Money is often posted after the
+        #             leaderboard goes final, so a failure here doesn't block
+        #             finalization; finalize_due_tournaments retries it later ---
+        cursor.execute("SAVEPOINT earnings")
+        try:
+            money_note = "" if record_earnings(cursor, tournament, api_key) else " (earnings not posted yet)"
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT earnings")
+            money_note = f" (earnings unavailable: {e})"
+
+        # --- Step 9: Mark tournament as finalized ---
+        cursor.execute("""
+            UPDATE tournaments
+            SET is_finalized = TRUE, finalized_at = NOW()
+            WHERE tournament_id = %s
+        """, (tournament_id,))
+
+        conn.commit()
+        return True, f"{tournament['name']} finalized successfully{money_note}."
+
+    except Exception as e:
+        conn.rollback()
+        return False, f"Error finalizing {tournament_id}: {e}"
+
+
+def record_earnings(cursor, tournament, api_key):
+    """
+    Fetch the tournament's official money once, store it on
+    player_score_cache, set each user's tournament_scores.money to the sum of
+    their picks' earnings and add the change to season_standings.money.
+    Runs inside the caller's transaction. Returns False if nothing is posted yet.
+    """
+    tournament_id = tournament["tournament_id"]
+    earnings = get_tournament_earnings(
+        api_key, tournament.get("org_id") or "1", tournament.get("tourn_id"), tournament.get("year") or "2026"
+    )
+    earnings = earnings[earnings["Earnings"] > 0]
+    if earnings.empty:
+        return False
+
+    # Every cached player gets an amount; players with no money get 0
+    cursor.execute("""
+        UPDATE player_score_cache c
+        SET earnings = COALESCE(e.earnings, 0)
+        FROM player_score_cache c2
+        LEFT JOIN unnest(%(players)s::text[], %(amounts)s::bigint[]) AS e(player_id, earnings)
+          ON e.player_id = c2.player_id
+        WHERE c.tournament_id = %(tid)s
+          AND c2.tournament_id = c.tournament_id AND c2.player_id = c.player_id
+    """, {
+        "tid": tournament_id,
+        "players": earnings["PlayerID"].astype(str).tolist(),
+        "amounts": earnings["Earnings"].astype(int).tolist(),
+    })
+
+    cursor.execute("""
+        WITH earned AS (
+            SELECT ps.username, COALESCE(SUM(c.earnings), 0) AS money
+            FROM pick_scores ps
+            LEFT JOIN player_score_cache c
+              ON c.tournament_id = ps.tournament_id AND c.player_id = ps.player_id
+            WHERE ps.tournament_id = %(tid)s
+            GROUP BY ps.username
+        ),
+        previous AS (
+            SELECT username, money
+            FROM tournament_scores
+            WHERE tournament_id = %(tid)s
+        ),
+        updated AS (
+            UPDATE tournament_scores ts
+            SET money = e.money
+            FROM earned e
+            WHERE ts.tournament_id = %(tid)s AND ts.username = e.username
+            RETURNING ts.username, ts.money
+        )
+        INSERT INTO season_standings (username, money)
+        SELECT up.username, up.money - COALESCE(prev.money, 0)
+        FROM updated up
+        LEFT JOIN previous prev ON prev.username = up.username
+        ON CONFLICT (username) DO UPDATE SET
+            money = season_standings.money + EXCLUDED.money,
+            updated_at = now()
+    """, {"tid": tournament_id})
+
+    cursor.execute(
+        "UPDATE tournaments SET earnings_recorded_at = NOW() WHERE tournament_id = %s",
+        (tournament_id,)
+    )
+    return True
+
+
+def record_due_earnings(conn, cursor, api_key, now=None):
+    """
+    Retry earnings for tournaments finalized in the last EARNINGS_RETRY_DAYS
+    that didn't have them yet. Returns a list of (success, message).
+    """
+    cursor.execute("""
+        SELECT tournament_id, name, start_time, org_id, tourn_id, year
+        FROM tournaments
+        WHERE is_finalized = TRUE
+          AND earnings_recorded_at IS NULL
+          AND tourn_id IS NOT NULL
+          AND finalized_at > %s - make_interval(days => %s)
+        ORDER BY start_time ASC
+    """, (now or datetime.now(timezone.utc), EARNINGS_RETRY_DAYS))
+    results = []
+    for tournament in cursor.fetchall():
+        # The row lock keeps two workers from adding the same money twice
+        cursor.execute("""
+            SELECT 1 FROM tournaments
+            WHERE tournament_id = %s AND earnings_recorded_at IS NULL
+            FOR UPDATE SKIP LOCKED
+        """, (tournament["tournament_id"],))
+        if cursor.fetchone() is None:
+            conn.rollback()
+            continue
+        try:
+            if record_earnings(cursor, tournament, api_key):
+                conn.commit()
+                results.append((True, f"{tournament['name']} earnings recorded."))
+            else:
+                conn.rollback()
+        except Exception as e:
+            conn.rollback()
+            results.append((False, f"Error recording earnings for {tournament['tournament_id']}: {e}"))
+    return results
+
+
+def find_due_tournaments(cursor, now=None):
+    """Tournaments that ended (start + 5 days) but haven't been finalized."""
+    cursor.execute("""
+        SELECT tournament_id, name, start_time, org_id, tourn_id, year
+        FROM tournaments
+        WHERE start_time + INTERVAL '5 days' < %s
+          AND is_finalized = FALSE
+          AND tourn_id IS NOT NULL
+        ORDER BY start_time ASC
+    """, (now or datetime.now(timezone.utc),))
+    return cursor.fetchall()
+
+
+def finalize_due_tournaments(conn, cursor, api_key):
+    """
+    Finalize every due tournament, then pick up earnings that weren't posted
+    at finalization. Returns a list of (success, message).
+    """
+    return [
+        finalize_tournament(conn, cursor, tournament, api_key)
+        for tournament in find_due_tournaments(cursor)
+    ] + record_due_earnings(conn, cursor, api_key)
@@ -1,9 +1,38 @@
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+
+from utils.scoring import parse_scores
 
 RAPIDAPI_HOST = "live-golf-data.p.rapidapi.com"
 BASE_URL = "https://live-golf-data.p.rapidapi.com"
 
+# Leaderboard cache: fresh for LEADERBOARD_TTL seconds, then served stale for
+# up to LEADERBOARD_STALE_TTL more while a single background refresh runs.
+LEADERBOARD_TTL = 60
+LEADERBOARD_STALE_TTL = 10 * 60
+
+# HTTP client: keep-alive session, strict timeouts, bounded retries with
+# exponential backoff (plus jitter, honouring Retry-After) on 429/5xx and
+# network errors, and a circuit breaker that stops calling an upstream that
+# keeps failing. While it is open the cache serves the last good leaderboard.
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BREAKER_FAILURES = 5
+BREAKER_RESET = 60
+
 
 def _headers(api_key):
     return {
@@ -12,47 +41,357 @@ def _headers(api_key):
     }
 
 
+LEADERBOARD_COLUMNS = ["PlayerID", "Pos", "Player", "Score", "ScoreToPar", "Status"]
+EARNINGS_FIELDS = ["earnings.$numberInt", "earnings.$numberLong", "earnings.$numberDouble", "earnings"]
+
+
 def leaderboard_to_df(rows):
-    return pd.DataFrame([
-        {
-            "PlayerID": p.get("playerId"),
-            "Pos": p.get("position"),
-            "Player": f"{p.get('firstName')} {p.get('lastName')}",
-            "Score": p.get("total"),
-            "Status": p.get("status", "active")
-        }
-        for p in rows
-    ])
+    """
+    Leaderboard rows as typed columns: PlayerID, Pos, Player and Score (the
+    display text) as strings, ScoreToPar as float ("E" -> 0, "-"/"WD"/... ->
+    NaN, see utils.scoring.parse_scores) and Status as a category.
+    """
+    raw = pd.DataFrame.from_records(rows, columns=["playerId", "position", "firstName", "lastName", "total", "status"])
+    return pd.DataFrame({
+        "PlayerID": raw["playerId"].astype("string"),
+        "Pos": raw["position"].astype("string"),
+        "Player": (raw["firstName"].fillna("").astype("string") + " " + raw["lastName"].fillna("").astype("string")).str.strip().astype("string"),
+        "Score": raw["total"].astype("string"),
+        "ScoreToPar": parse_scores(raw["total"]),
+        "Status": raw["status"].fillna("active").astype("string").astype("category"),
+    }, columns=LEADERBOARD_COLUMNS)
 
 
 def earnings_to_df(rows):
-    return pd.DataFrame([
-        {
-            "PlayerID": p.get("playerId"),
-            "Earnings": int(p.get("earnings", {}).get("$numberInt", 0))
+    """
+    Earnings rows as PlayerID (string) and Earnings (int64 dollars, 0 when
+    missing). Amounts may be plain numbers or Mongo extended JSON
+    ({"$numberInt": "..."}, $numberLong, $numberDouble).
+    """
+    flat = pd.json_normalize(rows) if rows else pd.DataFrame(index=pd.RangeIndex(0))
+    amounts = pd.DataFrame({
+        f: pd.to_numeric(flat[f], errors="coerce") if f in flat else pd.Series(float("nan"), index=flat.index)
+        for f in EARNINGS_FIELDS
+    })
+    player_ids = flat["playerId"] if "playerId" in flat else pd.Series(pd.NA, index=flat.index)
+    return pd.DataFrame({
+        "PlayerID": player_ids.astype("string"),
+        "Earnings": amounts.bfill(axis=1).iloc[:, 0].fillna(0).round().astype("int64"),
+    })
+
+
+# ----------------------------
+# Backends
+# ----------------------------
+# Where raw leaderboard JSON comes from. Chosen from the environment:
+#   LEADERBOARD_REPLAY_DIR   serve recorded snapshots from disk (ReplayBackend)
+#   LEADERBOARD_REPLAY_STEP  seconds per snapshot when replaying (default: one per fetch)
+#   LEADERBOARD_BASE_URL     point the live backend elsewhere, e.g. leaderboard_standin.py
+#   LEADERBOARD_RECORD_DIR   save every live response for later replay
+
+def snapshot_dir(root, org_id, tourn_id, year):
+    """Directory holding the recorded snapshots for one tournament."""
+    return Path(root) / f"{org_id}-{tourn_id}-{year}"
+
+
+def earnings_path(root, org_id, tourn_id, year):
+    """File holding the recorded earnings response for one tournament."""
+    return Path(root) / f"{org_id}-{tourn_id}-{year}.earnings.json"
+
+
+class UpstreamUnavailable(RuntimeError):
+    """The leaderboard API failed after retries, or the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive failed calls and rejects calls for
+    `reset_after` seconds; then lets one trial call through (half-open) and
+    closes again if it succeeds.
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_after=BREAKER_RESET):
+        self.failures = failures
+        self.reset_after = reset_after
+        self._failed = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_after and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record(self, ok):
+        with self._lock:
+            self._trial = False
+            if ok:
+                self._failed = 0
+                self._opened_at = None
+            else:
+                self._failed += 1
+                if self._failed >= self.failures:
+                    self._opened_at = time.monotonic()
+
+
+class RapidApiBackend:
+    """Live leaderboard over HTTP, optionally recording each response to disk."""
+
+    def __init__(self, base_url=BASE_URL, record_dir=None):
+        self.base_url = base_url.rstrip("/")
+        self.record_dir = record_dir
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.breaker = CircuitBreaker()
+
+    def _get(self, path, api_key, params):
+        """GET base_url/path and return the JSON body, retrying transient failures."""
+        if not self.breaker.allow():
+            raise UpstreamUnavailable(f"{path}: circuit open after repeated failures")
+
+        # Every outcome is recorded, so a failed half-open trial can't leave
+        # the breaker waiting on a result forever
+        ok = False
+        try:
+            error = None
+            for attempt in range(MAX_RETRIES + 1):
+                if attempt:
+                    time.sleep(self._backoff(attempt, error))
+                try:
+                    resp = self.session.get(
+                        f"{self.base_url}{path}",
+                        headers=_headers(api_key),
+                        params=params,
+                        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+                    )
+                except requests.RequestException as e:
+                    error = e
+                    continue
+                if resp.status_code in RETRY_STATUSES:
+                    error = resp
+                    continue
+                data = resp.json()
+                ok = True
+                return data
+
+            detail = f"HTTP {error.status_code}" if isinstance(error, requests.Response) else repr(error)
+            raise UpstreamUnavailable(f"{path}: {detail} after {MAX_RETRIES + 1} attempts")
+        finally:
+            self.breaker.record(ok)
+
+    @staticmethod
+    def _backoff(attempt, error):
+        retry_after = error.headers.get("Retry-After") if isinstance(error, requests.Response) else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX)
+        return min(BACKOFF_BASE * 2 ** (attempt - 1), BACKOFF_MAX) * random.uniform(0.5, 1.0)
+
+    def fetch(self, api_key, org_id, tourn_id, year):
+        params = {
+            "orgId": org_id,
+            "tournId": tourn_id,
+            "year": year
         }
-        for p in rows
-    ])
 
+        data = self._get("/leaderboard", api_key, params)
 
-def get_live_leaderboard(api_key, org_id, tourn_id, year):
-    """Fetch leaderboard for a specific tournament. All params required."""
-    params = {
-        "orgId": org_id,
-        "tournId": tourn_id,
-        "year": year
-    }
+        if self.record_dir and "leaderboardRows" in data:
+            self._record(data, org_id, tourn_id, year)
+        return data
 
-    leaderboard_resp = requests.get(
-        f"{BASE_URL}/leaderboard",
-        headers=_headers(api_key),
-        params=params
-    )
+    def fetch_earnings(self, api_key, org_id, tourn_id, year):
+        data = self._get("/earnings", api_key, {"orgId": org_id, "tournId": tourn_id, "year": year})
+
+        if self.record_dir and "leaderboard" in data:
+            path = earnings_path(self.record_dir, org_id, tourn_id, year)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(data))
+        return data
+
+    def _record(self, data, org_id, tourn_id, year):
+        folder = snapshot_dir(self.record_dir, org_id, tourn_id, year)
+        folder.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        (folder / f"{stamp}.json").write_text(json.dumps(data))
+
+
+class ReplayBackend:
+    """
+    Serves recorded leaderboard JSON from <root>/<orgId>-<tournId>-<year>/*.json
+    in filename order. Without `step` each fetch advances one snapshot; with it,
+    snapshots advance every `step` seconds of wall time. The last one repeats.
+    Earnings come from <root>/<orgId>-<tournId>-<year>.earnings.json.
+    """
+
+    def __init__(self, root, step=None):
+        self.root = Path(root)
+        self.step = step
+        self._started = {}
+        self._served = {}
+        self._lock = threading.Lock()
 
-    data = leaderboard_resp.json()
+    def snapshots(self, org_id, tourn_id, year):
+        return sorted(snapshot_dir(self.root, org_id, tourn_id, year).glob("*.json"))
+
+    def fetch(self, api_key, org_id, tourn_id, year):
+        paths = self.snapshots(org_id, tourn_id, year)
+        if not paths:
+            raise RuntimeError(f"No recorded leaderboard for {org_id}-{tourn_id}-{year} in {self.root}")
+
+        key = (str(org_id), str(tourn_id), str(year))
+        with self._lock:
+            if self.step:
+                started = self._started.setdefault(key, time.monotonic())
+                index = int((time.monotonic() - started) / self.step)
+            else:
+                index = self._served.get(key, 0)
+                self._served[key] = index + 1
+
+        return json.loads(paths[min(index, len(paths) - 1)].read_text())
+
+    def fetch_earnings(self, api_key, org_id, tourn_id, year):
+        path = earnings_path(self.root, org_id, tourn_id, year)
+        if not path.exists():
+            raise RuntimeError(f"No recorded earnings for {org_id}-{tourn_id}-{year} in {self.root}")
+        return json.loads(path.read_text())
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        replay_dir = os.environ.get("LEADERBOARD_REPLAY_DIR")
+        if replay_dir:
+            step = os.environ.get("LEADERBOARD_REPLAY_STEP")
+            _backend = ReplayBackend(replay_dir, step=float(step) if step else None)
+        else:
+            _backend = RapidApiBackend(
+                os.environ.get("LEADERBOARD_BASE_URL", BASE_URL),
+                os.environ.get("LEADERBOARD_RECORD_DIR"),
+            )
+    return _backend
+
+
+def set_backend(backend):
+    """Swap the leaderboard backend (e.g. for benchmarks) and drop cached data."""
+    global _backend
+    _backend = backend
+    _leaderboard_cache.clear()
+
+
+def _fetch_leaderboard(api_key, org_id, tourn_id, year):
+    data = get_backend().fetch(api_key, org_id, tourn_id, year)
 
     if "leaderboardRows" not in data:
         raise RuntimeError(f"Leaderboard API error: {data}")
 
     lb_df = leaderboard_to_df(data["leaderboardRows"])
-    return lb_df.reset_index(drop=True)
\ No newline at end of file
+    return lb_df.reset_index(drop=True)
+
+
+class _LeaderboardCache:
+    """
+    Process-wide leaderboard cache shared by every session. Concurrent misses
+    for the same key wait on one upstream call; stale entries are served while
+    one background thread refreshes them, and kept if the refresh fails. When
+    even an expired entry's refresh fails (upstream down, circuit open), the
+    last good leaderboard is served rather than an error.
+    """
+
+    def __init__(self):
+        self._entries = {}      # key -> (fetched_at, DataFrame)
+        self._locks = {}        # key -> Lock held while fetching
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _store(self, key, df):
+        self._entries[key] = (time.monotonic(), df)
+
+    def _refresh(self, key, lock, fetch):
+        try:
+            self._store(key, fetch())
+        except Exception:
+            pass
+        finally:
+            lock.release()
+
+    def get(self, key, fetch, ttl, stale_ttl):
+        entry = self._entries.get(key)
+        age = time.monotonic() - entry[0] if entry else None
+
+        if entry and age < ttl:
+            return entry[1]
+
+        lock = self._lock_for(key)
+
+        if entry and ttl > 0 and age < ttl + stale_ttl:
+            if lock.acquire(blocking=False):
+                threading.Thread(target=self._refresh, args=(key, lock, fetch), daemon=True).start()
+            return entry[1]
+
+        with lock:
+            # Another caller may have filled the entry while we waited
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[0] < max(ttl, 1):
+                return entry[1]
+            try:
+                df = fetch()
+            except Exception:
+                if entry:
+                    return entry[1]
+                raise
+            self._store(key, df)
+            return df
+
+    def clear(self):
+        with self._guard:
+            self._entries.clear()
+
+
+_leaderboard_cache = _LeaderboardCache()
+
+
+def get_live_leaderboard(api_key, org_id, tourn_id, year, ttl=None):
+    """
+    Fetch leaderboard for a specific tournament. All params required.
+    Results are cached per (org_id, tourn_id, year) for `ttl` seconds
+    (LEADERBOARD_TTL by default); pass ttl=0 to force an upstream call,
+    which bypasses the cache entirely and raises if the upstream fails
+    (finalization must never score an old board).
+    """
+    if ttl == 0:
+        return _fetch_leaderboard(api_key, org_id, tourn_id, year)
+
+    key = (str(org_id), str(tourn_id), str(year))
+    df = _leaderboard_cache.get(
+        key,
+        lambda: _fetch_leaderboard(api_key, org_id, tourn_id, year),
+        LEADERBOARD_TTL if ttl is None else ttl,
+        LEADERBOARD_STALE_TTL,
+    )
+    return df.copy()
+
+
+def get_tournament_earnings(api_key, org_id, tourn_id, year):
+    """
+    Official money for a completed tournament as earnings_to_df() (PlayerID,
+    Earnings). Not cached: it is fetched once, at finalization.
+    """
+    data = get_backend().fetch_earnings(api_key, org_id, tourn_id, year)
+
+    if "leaderboard" not in data:
+        raise RuntimeError(f"Earnings API error: {data}")
+
+    return earnings_to_df(data["leaderboard"])
@@ -0,0 +1,183 @@
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from utils import live_poller
+from utils.leaderboard_api import LEADERBOARD_COLUMNS, snapshot_dir
+from utils.scoring import parse_scores
+
+
+# ----------------------------
+# Leaderboard snapshot history
+# ----------------------------
+# Every leaderboard the live poller publishes is appended to
+# leaderboard_history (migrations/008), one row per player whose position,
+# name, score or status differs from that player's last stored row, plus a
+# `removed` row when a player drops off the board. The whole board is sent
+# each time and the database drops unchanged rows, so a snapshot whose write
+# failed is caught up by the next one. The state at any moment is
+# the latest row per player at or before it.
+
+HISTORY_COLUMNS = ["player_id", "observed_at", "position", "player_name", "score_to_par", "status", "removed"]
+
+
+def record_snapshot(pool, key, snapshot):
+    """
+    Append a poller snapshot for event `key` (org_id, tourn_id, year): every
+    row on the board plus the removals. Rows identical to the player's latest
+    stored row are skipped in SQL, so only what changed is written.
+    """
+    observed_at = datetime.fromtimestamp(snapshot.fetched_at, timezone.utc)
+    board = snapshot.df[["PlayerID", "Pos", "Player", "Score", "Status"]].astype(object)
+    board = board.where(board.notna(), None)
+    rows = [
+        (*key, str(pid), observed_at, pos, name, score, str(status).lower(), False)
+        for pid, pos, name, score, status in board.itertuples(index=False, name=None)
+    ] + [(*key, str(pid), observed_at, None, None, None, None, True) for pid in snapshot.removed]
+    if not rows:
+        return 0
+
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cursor:
+            execute_values(cursor, """
+                INSERT INTO leaderboard_history
+                    (org_id, tourn_id, year, player_id, observed_at, position, player_name, score_to_par, status, removed)
+                SELECT v.*
+                FROM (VALUES %s) AS v(org_id, tourn_id, year, player_id, observed_at, position, player_name, score_to_par, status, removed)
+                LEFT JOIN LATERAL (
+                    SELECT h.position, h.player_name, h.score_to_par, h.status, h.removed
+                    FROM leaderboard_history h
+                    WHERE h.org_id = v.org_id AND h.tourn_id = v.tourn_id AND h.year = v.year
+                      AND h.player_id = v.player_id
+                    ORDER BY h.observed_at DESC
+                    LIMIT 1
+                ) last ON TRUE
+                WHERE last.removed IS NULL
+                   OR (last.position, last.player_name, last.score_to_par, last.status, last.removed)
+                      IS DISTINCT FROM (v.position, v.player_name, v.score_to_par, v.status, v.removed)
+                ON CONFLICT DO NOTHING
+            """, rows, template="(%s, %s, %s, %s, %s::timestamptz, %s, %s, %s, %s, %s::boolean)", page_size=len(rows))
+            written = cursor.rowcount
+        conn.commit()
+        return written
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
+
+
+def install_recorder(pool):
+    """Record every snapshot published by the live pollers (idempotent)."""
+    if not any(getattr(l, "history_pool", None) is pool for l in live_poller.listeners):
+        def recorder(key, snapshot):
+            record_snapshot(pool, key, snapshot)
+        recorder.history_pool = pool
+        live_poller.listeners.append(recorder)
+
+
+def load_history(cursor, org_id, tourn_id, year, until=None):
+    """All stored rows for an event (up to `until`), oldest first, as a DataFrame."""
+    cursor.execute("""
+        SELECT player_id, observed_at, position, player_name, score_to_par, status, removed
+        FROM leaderboard_history
+        WHERE org_id = %s AND tourn_id = %s AND year = %s
+          AND (%s::timestamptz IS NULL OR observed_at <= %s::timestamptz)
+        ORDER BY observed_at, player_id
+    """, (str(org_id), str(tourn_id), str(year), until, until))
+    return pd.DataFrame(cursor.fetchall(), columns=HISTORY_COLUMNS)
+
+
+def state_at(cursor, org_id, tourn_id, year, at):
+    """
+    The leaderboard as it stood at `at`, shaped like leaderboard_to_df()
+    (PlayerID, Pos, Player, Score, ScoreToPar, Status).
+    """
+    cursor.execute("""
+        SELECT player_id, position, player_name, score_to_par, status, removed
+        FROM (
+            SELECT DISTINCT ON (player_id) *
+            FROM leaderboard_history
+            WHERE org_id = %s AND tourn_id = %s AND year = %s AND observed_at <= %s
+            ORDER BY player_id, observed_at DESC
+        ) latest
+        WHERE NOT removed
+    """, (str(org_id), str(tourn_id), str(year), at))
+    df = pd.DataFrame(cursor.fetchall(), columns=["player_id", "position", "player_name", "score_to_par", "status", "removed"])
+    return pd.DataFrame({
+        "PlayerID": df["player_id"].astype("string"),
+        "Pos": df["position"].astype("string"),
+        "Player": df["player_name"].astype("string"),
+        "Score": df["score_to_par"].astype("string"),
+        "ScoreToPar": parse_scores(df["score_to_par"]),
+        "Status": df["status"].fillna("active").astype("string").astype("category"),
+    }, columns=LEADERBOARD_COLUMNS)
+
+
+def score_timeline(history):
+    """
+    Score-to-par per player (columns) at every observed_at (rows): each
+    player's latest stored row carried forward; NaN before they appear,
+    after removal, and while the score is not a number ("-", "WD", ...).
+    """
+    if history.empty:
+        return pd.DataFrame()
+    # inf marks "stored, but no valid score" so ffill can't carry an older score past it
+    scores = parse_scores(history["score_to_par"]).fillna(np.inf).mask(history["removed"].astype(bool).to_numpy(), np.inf)
+    timeline = pd.DataFrame({
+        "observed_at": history["observed_at"].to_numpy(),
+        "player_id": history["player_id"].astype(str).to_numpy(),
+        "score": scores.to_numpy(),
+    }).pivot(index="observed_at", columns="player_id", values="score")
+    return timeline.ffill().replace(np.inf, np.nan)
+
+
+def team_trajectories(history, picks):
+    """
+    Team score (sum of the valid scores of each user's picks, as in
+    utils.scoring) at every observed_at. `picks` is [(username, player_id)].
+    Returns a DataFrame indexed by observed_at with one column per username.
+    """
+    timeline = score_timeline(history)
+    picks = pd.DataFrame(picks, columns=["username", "player_id"])
+    if timeline.empty or picks.empty:
+        return pd.DataFrame()
+
+    # users x players pick counts, aligned to the timeline's players
+    membership = pd.crosstab(picks["username"], picks["player_id"].astype(str))
+    membership = membership.reindex(columns=timeline.columns, fill_value=0)
+
+    totals = timeline.fillna(0.0) @ membership.T
+    counted = timeline.notna().astype(int) @ membership.T
+    return totals.where(counted > 0)
+
+
+def export_replay(cursor, org_id, tourn_id, year, root):
+    """
+    Rebuild every stored state as leaderboard JSON under root for
+    ReplayBackend (one file per observed_at). Returns the number written.
+    """
+    history = load_history(cursor, org_id, tourn_id, year)
+    folder = snapshot_dir(root, org_id, tourn_id, year)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    state = {}
+    written = 0
+    for observed_at, rows in history.groupby("observed_at", sort=True):
+        for row in rows.itertuples(index=False):
+            if row.removed:
+                state.pop(row.player_id, None)
+            else:
+                first, _, last = (row.player_name or "").partition(" ")
+                state[row.player_id] = {
+                    "playerId": row.player_id, "position": row.position, "firstName": first,
+                    "lastName": last, "total": row.score_to_par, "status": row.status,
+                }
+        stamp = observed_at.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        (folder / f"{stamp}.json").write_text(json.dumps({"leaderboardRows": list(state.values())}))
+        written += 1
+    return written
@@ -0,0 +1,164 @@
+import threading
+import time
+
+from utils import leaderboard_api
+
+
+# ----------------------------
+# Live leaderboard poller
+# ----------------------------
+# One background thread per active tournament fetches the leaderboard and
+# publishes it to an in-process store; pages read the latest snapshot instead
+# of fetching, so upstream load no longer grows with the number of viewers.
+#
+# The schedule adapts to activity: POLL_FAST right after a change, doubling
+# on each unchanged poll up to POLL_SLOW, and POLL_IDLE once nothing has
+# moved for IDLE_AFTER (overnight, between rounds). A poller nobody has read
+# for READER_TIMEOUT stops; the next reader starts a new one.
+#
+# Every snapshot carries a version that only moves when some row changed, and
+# the row-level delta against the previous snapshot.
+
+POLL_FAST = 30
+POLL_SLOW = 5 * 60
+POLL_IDLE = 15 * 60
+IDLE_AFTER = 45 * 60
+READER_TIMEOUT = 30 * 60
+# A first reader waits this long for the first fetch, then renders without a
+# board; the page's watch fragment picks the snapshot up once it lands.
+FIRST_SNAPSHOT_WAIT = 1.5
+
+DELTA_COLUMNS = ["Pos", "Player", "Score", "Status"]
+
+# Callables(key, snapshot) run on the poller thread for every new version
+# once it is published, e.g. utils.leaderboard_history's recorder. Failures
+# are ignored.
+listeners = []
+
+
+def leaderboard_delta(previous, current):
+    """
+    Rows of `current` that are new or differ from `previous` in any of
+    DELTA_COLUMNS, and the PlayerIDs that disappeared. Returns (changed_df, removed_ids).
+    """
+    if previous is None or previous.empty:
+        return current, []
+
+    prev = previous.set_index(previous["PlayerID"].astype(str))
+    cur = current.set_index(current["PlayerID"].astype(str))
+    old = prev.reindex(cur.index)[DELTA_COLUMNS].astype("string").fillna("")
+    new = cur[DELTA_COLUMNS].astype("string").fillna("")
+    changed = (old != new).any(axis=1) | ~cur.index.isin(prev.index)
+    removed = prev.index[~prev.index.isin(cur.index)].tolist()
+    return current[changed.to_numpy()], removed
+
+
+class LiveSnapshot:
+
+    def __init__(self, version, fetched_at, df, changed, removed):
+        self.version = version          # moves only when a row changed
+        self.fetched_at = fetched_at    # time.time() of the poll that produced it
+        self.df = df
+        self.changed = changed          # rows new or changed since version - 1
+        self.removed = removed          # PlayerIDs gone since version - 1
+        self.recorded = False           # set once every listener has run
+
+
+class LeaderboardPoller:
+
+    def __init__(self, api_key, org_id, tourn_id, year):
+        self.key = (str(org_id), str(tourn_id), str(year))
+        self.api_key = api_key
+        self.snapshot = None
+        self.error = None
+        self.last_read = time.monotonic()
+        self._ready = threading.Event()
+        self._thread = None
+
+    def alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"leaderboard-poller-{'-'.join(self.key)}", daemon=True)
+        self._thread.start()
+
+    def read(self, wait=FIRST_SNAPSHOT_WAIT):
+        """Latest snapshot, waiting up to `wait` seconds for the first one. None if there is none yet."""
+        self.last_read = time.monotonic()
+        self._ready.wait(wait)
+        return self.snapshot
+
+    def poll_once(self):
+        """Fetch once and publish a new version if anything changed. Returns True if it did."""
+        df = leaderboard_api._fetch_leaderboard(self.api_key, *self.key)
+        previous = self.snapshot
+        changed, removed = leaderboard_delta(previous.df if previous else None, df)
+        if previous is not None and changed.empty and not removed:
+            previous.fetched_at = time.time()
+            return False
+
+        snapshot = LiveSnapshot((previous.version if previous else 0) + 1, time.time(), df, changed, removed)
+        self.snapshot = snapshot
+        self._ready.set()
+        for listener in list(listeners):
+            try:
+                listener(self.key, snapshot)
+            except Exception:
+                pass
+        snapshot.recorded = True
+        return True
+
+    def _run(self):
+        interval = POLL_FAST
+        last_change = time.monotonic()
+        while time.monotonic() - self.last_read < READER_TIMEOUT:
+            try:
+                moved = self.poll_once()
+                self.error = None
+            except Exception as exc:
+                moved = False
+                self.error = exc
+            finally:
+                self._ready.set()
+
+            if moved:
+                last_change = time.monotonic()
+                interval = POLL_FAST
+            elif time.monotonic() - last_change > IDLE_AFTER:
+                interval = POLL_IDLE
+            else:
+                interval = min(interval * 2, POLL_SLOW)
+            time.sleep(interval)
+
+
+_pollers = {}
+_pollers_lock = threading.Lock()
+
+
+def get_poller(api_key, org_id, tourn_id, year):
+    """The running poller for a tournament, starting one if needed."""
+    key = (str(org_id), str(tourn_id), str(year))
+    with _pollers_lock:
+        poller = _pollers.get(key)
+        if poller is None:
+            poller = _pollers[key] = LeaderboardPoller(api_key, org_id, tourn_id, year)
+        if not poller.alive():
+            poller.last_read = time.monotonic()
+            poller.start()
+        return poller
+
+
+def live_snapshot(api_key, org_id, tourn_id, year):
+    """
+    Latest published leaderboard snapshot for a tournament (see LiveSnapshot),
+    or None if the first fetch hasn't succeeded yet.
+    """
+    return get_poller(api_key, org_id, tourn_id, year).read()
+
+
+def stop_pollers():
+    """Forget every poller; their threads exit at their next wake-up. For benchmarks."""
+    with _pollers_lock:
+        for poller in _pollers.values():
+            poller.last_read = float("-inf")
+        _pollers.clear()
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+import streamlit as st
+
+
+# ----------------------------
+# Settings (overridable in secrets.toml)
+# ----------------------------
+DEFAULT_ROUNDS = 12
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+HASH_TIMEOUT = 10                     # seconds to wait for a queued hash
+
+MAX_FAILURES = 5                      # failed attempts allowed per window...
+FAILURE_WINDOW = 5 * 60               # ...per username and per IP (seconds)
+
+
+def _setting(key, default):
+    try:
+        return st.secrets.get(key, default)
+    except Exception:
+        return default
+
+
+# bcrypt releases the GIL, so a small pool keeps a burst of logins from
+# running more hashes at once than there are cores to run them.
+_executor = ThreadPoolExecutor(
+    max_workers=int(_setting("BCRYPT_WORKERS", DEFAULT_WORKERS)),
+    thread_name_prefix="bcrypt",
+)
+
+
+def hash_password(password):
+    """bcrypt-hash a password on the worker pool. Returns the hash as text."""
+    rounds = int(_setting("BCRYPT_ROUNDS", DEFAULT_ROUNDS))
+    future = _executor.submit(bcrypt.hashpw, password.encode(), bcrypt.gensalt(rounds))
+    return future.result(timeout=HASH_TIMEOUT).decode()
+
+
+def check_password(password, password_hash):
+    """Verify a password against a stored bcrypt hash on the worker pool."""
+    future = _executor.submit(bcrypt.checkpw, password.encode(), password_hash.encode())
+    return future.result(timeout=HASH_TIMEOUT)
+
+
+class LoginThrottle:
+    """
+    Sliding-window failed-attempt counter shared by every session. A key
+    (username or client IP) is blocked once it has MAX_FAILURES failures
+    inside FAILURE_WINDOW seconds.
+    """
+
+    def __init__(self, max_failures=MAX_FAILURES, window=FAILURE_WINDOW):
+        self.max_failures = max_failures
+        self.window = window
+        self._failures = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def _prune(self, key, now):
+        attempts = self._failures[key]
+        while attempts and now - attempts[0] > self.window:
+            attempts.popleft()
+        if not attempts:
+            del self._failures[key]
+        return attempts
+
+    def retry_after(self, *keys):
+        """Seconds until every key may try again (0 if none are blocked)."""
+        now = time.monotonic()
+        wait = 0
+        with self._lock:
+            for key in filter(None, keys):
+                attempts = self._prune(key, now)
+                if len(attempts) >= self.max_failures:
+                    wait = max(wait, self.window - (now - attempts[0]))
+        return int(wait) + 1 if wait else 0
+
+    def record_failure(self, *keys):
+        now = time.monotonic()
+        with self._lock:
+            for key in filter(None, keys):
+                self._failures[key].append(now)
+
+    def reset(self, *keys):
+        with self._lock:
+            for key in filter(None, keys):
+                self._failures.pop(key, None)
+
+
+login_throttle = LoginThrottle()
+
+
+def client_ip():
+    """Best-effort client IP for throttling; None if Streamlit can't tell."""
+    try:
+        ip = getattr(st.context, "ip_address", None)
+        if ip:
+            return ip
+        forwarded = st.context.headers.get("X-Forwarded-For", "")
+        return forwarded.split(",")[0].strip() or None
+    except Exception:
+        return None
@@ -0,0 +1,101 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+# ----------------------------
+# Opt-in rerun profiler
+# ----------------------------
+# Admins switch it on from the Admin page.
+# While on, every rerun records nested timing spans, and optionally a
+# cProfile capture, into `profiles` (last RECENT_PROFILES, newest first).
+
+RECENT_PROFILES = 20
+CPROFILE_LINES = 40
+
+settings = {"enabled": False, "cprofile": False}
+profiles = deque(maxlen=RECENT_PROFILES)
+
+_local = threading.local()
+
+
+class RerunProfile:
+
+    def __init__(self, cprofile=False):
+        self.at = datetime.now(timezone.utc)
+        self.t0 = time.perf_counter()
+        self.spans = []          # [name, depth, start_ms, duration_ms]
+        self.depth = 0
+        self.mark = 0.0          # end of the last top-level section (ms)
+        self.profiler = cProfile.Profile() if cprofile else None
+        if self.profiler:
+            self.profiler.enable()
+
+    def finish(self, label):
+        cprofile_text = None
+        if self.profiler:
+            self.profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(CPROFILE_LINES)
+            cprofile_text = out.getvalue()
+        return {
+            "at": self.at.isoformat(),
+            "label": label,
+            "total_ms": round((time.perf_counter() - self.t0) * 1000, 2),
+            "spans": [
+                {"name": n, "depth": d, "start_ms": round(s, 2), "ms": round(ms, 2)}
+                for n, d, s, ms in self.spans
+            ],
+            "cprofile": cprofile_text,
+        }
+
+
+def start_rerun():
+    """Begin profiling this rerun if profiling is on. Drops any unfinished profile."""
+    unfinished = getattr(_local, "profile", None)
+    if unfinished is not None and unfinished.profiler:
+        unfinished.profiler.disable()
+    _local.profile = RerunProfile(settings["cprofile"]) if settings["enabled"] else None
+
+
+def checkpoint(name):
+    """Record a top-level section covering the time since the previous one ended."""
+    profile = getattr(_local, "profile", None)
+    if profile is None:
+        return
+    now = (time.perf_counter() - profile.t0) * 1000
+    profile.spans.append([name, 0, profile.mark, now - profile.mark])
+    profile.mark = now
+
+
+def finish_rerun(label):
+    profile = getattr(_local, "profile", None)
+    _local.profile = None
+    if profile is not None:
+        profiles.appendleft(profile.finish(label))
+
+
+@contextmanager
+def span(name):
+    """Time a block as a named span of the current rerun's profile (no-op when off)."""
+    profile = getattr(_local, "profile", None)
+    if profile is None:
+        yield
+        return
+
+    entry = [name, profile.depth, (time.perf_counter() - profile.t0) * 1000, 0.0]
+    profile.spans.append(entry)
+    profile.depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry[3] = (time.perf_counter() - started) * 1000
+        profile.depth -= 1
+        if profile.depth == 0:
+            profile.mark = entry[2] + entry[3]
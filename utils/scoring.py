@@ -0,0 +1,93 @@
+import pandas as pd
+
+
+# ----------------------------
+# League scoring rules
+# ----------------------------
+#   +1  tier winner (best score among the players picked in that tier)
+#   -1  missed cut
+#   +1  best team score (sum of valid pick scores) for the week
+#
+# Shared by finalization, the live This Week view and the Results page so all
+# three always agree.
+
+PICK_COLUMNS = ["username", "tier_number", "player_id"]
+
+
+def parse_scores(scores):
+    """Vectorized score-to-par parse: "E" -> 0, "+3" -> 3, "-2" -> -2, anything else -> NaN."""
+    s = pd.Series(scores, dtype="object").astype("string").str.strip()
+    s = s.mask(s.eq("E").fillna(False), "0").str.replace("+", "", regex=False)
+    return pd.to_numeric(s, errors="coerce").astype("float64")
+
+
+def player_scores(player_ids, score_text, status=None, score=None):
+    """
+    Build the per-player score table scoring runs against, indexed by player_id
+    (as text) with columns score (float, NaN if not a valid score), score_text
+    and missed_cut. Pass `score` when the text is already parsed (the
+    leaderboard's ScoreToPar column).
+    """
+    player_ids = pd.Series(player_ids, dtype="object").astype(str).reset_index(drop=True)
+    score_text = pd.Series(score_text, dtype="object").reset_index(drop=True)
+    if status is None:
+        status = pd.Series("active", index=player_ids.index)
+    status = pd.Series(status, dtype="object").reset_index(drop=True)
+
+    df = pd.DataFrame({
+        "player_id": player_ids,
+        "score": parse_scores(score_text) if score is None else pd.Series(score, dtype="float64").reset_index(drop=True),
+        "score_text": score_text.fillna("").astype(str),
+        "missed_cut": status.astype(str).str.lower().eq("cut"),
+    })
+    return df.drop_duplicates("player_id", keep="last").set_index("player_id")
+
+
+def score_picks(picks, scores):
+    """
+    Score every pick against a player_scores() table.
+
+    Returns (pick_df, team_df):
+      pick_df  one row per pick: username, tier_number, player_id, score,
+               score_text, tier_winner, missed_cut, points
+      team_df  one row per username with picks: team_score (NaN if no valid
+               scores), best_team, points (tier points + team bonus)
+    """
+    pick_df = pd.DataFrame(picks, columns=PICK_COLUMNS)
+    pick_df["player_id"] = pick_df["player_id"].astype(str)
+    pick_df["tier_number"] = pick_df["tier_number"].astype(int)
+    pick_df = pick_df.join(scores, on="player_id")
+    pick_df["score_text"] = pick_df["score_text"].fillna("")
+    pick_df["missed_cut"] = pick_df["missed_cut"].fillna(False).astype(bool)
+
+    tier_best = pick_df.groupby("tier_number")["score"].transform("min")
+    pick_df["tier_winner"] = pick_df["score"].notna() & pick_df["score"].eq(tier_best)
+    pick_df["points"] = pick_df["tier_winner"].astype(int) - pick_df["missed_cut"].astype(int)
+
+    by_user = pick_df.groupby("username")
+    team_df = pd.DataFrame({
+        "team_score": by_user["score"].sum(min_count=1),
+        "points": by_user["points"].sum(),
+    })
+    team_df["best_team"] = team_df["team_score"].notna() & team_df["team_score"].eq(team_df["team_score"].min())
+    team_df["points"] += team_df["best_team"].astype(int)
+
+    return pick_df, team_df
+
+
+def format_money(amount):
+    """Season money for display: $0, $850K, $12.4M."""
+    amount = int(amount or 0)
+    if amount >= 1_000_000:
+        return f"${amount / 1_000_000:.1f}M"
+    if amount >= 1_000:
+        return f"${amount / 1_000:.0f}K"
+    return f"${amount}"
+
+
+def format_score(total):
+    """Team/player score for display: E, -3, +2."""
+    if pd.isna(total) or total == 0:
+        return "E"
+    total = int(total)
+    return f"+{total}" if total > 0 else str(total)
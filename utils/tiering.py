@@ -0,0 +1,77 @@
+import pandas as pd
+
+
+# ----------------------------
+# Auto-tiering
+# ----------------------------
+# Ranks a tournament field on last-6-months strokes gained (the research
+# table) and cuts the ranking into tiers of configurable size. The admin
+# reviews the proposal in the tier pickers before saving.
+#
+# Model: a weighted sum of the SG components, shrunk toward tour average (0)
+# for players with few measured events:
+#
+#     rating = sum(weight_c * SG_c) * events / (events + PRIOR_EVENTS)
+#
+# Players with no research row are ranked after everyone who has one.
+
+SG_COMPONENTS = ["OTT", "APP", "ARG", "Putt"]
+DEFAULT_WEIGHTS = {"OTT": 1.0, "APP": 1.0, "ARG": 0.8, "Putt": 0.6}
+DEFAULT_TIER_SIZES = [6, 8, 10, 12, 14, 16]
+PRIOR_EVENTS = 4
+
+
+def normalize_name(names):
+    """Vectorized name key for matching research rows to players: lowercase alphanumerics only."""
+    return pd.Series(names, dtype="object").astype(str).str.lower().str.replace(r"[^a-z0-9]", "", regex=True)
+
+
+def rate_field(field, research, weights=None, prior_events=PRIOR_EVENTS):
+    """
+    Rate every player in `field` (columns player_id, name) against `research`
+    (the Research page frame: Player, Events and the SG columns).
+
+    Returns the field sorted best first with columns player_id, name, events,
+    rating (NaN when the player has no research data) and rank (1-based).
+    """
+    weights = DEFAULT_WEIGHTS if weights is None else weights
+
+    field = pd.DataFrame(field, columns=["player_id", "name"]).reset_index(drop=True)
+    field["player_id"] = field["player_id"].astype(str)
+    field["key"] = normalize_name(field["name"])
+
+    stats = pd.DataFrame(research).copy()
+    stats["key"] = normalize_name(stats["Player"])
+    stats = stats.drop_duplicates("key", keep="last")
+
+    components = stats[SG_COMPONENTS].astype("float64")
+    weighted = (components * pd.Series(weights).reindex(SG_COMPONENTS).fillna(0.0)).sum(axis=1, min_count=1)
+    # Rows with no component split fall back to the total at the average weight
+    weighted = weighted.fillna(stats["Total"].astype("float64") * sum(weights.values()) / len(SG_COMPONENTS))
+
+    events = pd.to_numeric(stats["Events"], errors="coerce").fillna(0).astype("float64")
+    stats["events"] = events
+    stats["rating"] = weighted * events / (events + prior_events)
+
+    rated = field.merge(stats[["key", "events", "rating"]], on="key", how="left")
+    rated = rated.sort_values(["rating", "name"], ascending=[False, True], na_position="last", kind="mergesort")
+    rated = rated.drop(columns="key").reset_index(drop=True)
+    rated["events"] = rated["events"].astype("Int64")
+    rated["rank"] = rated.index + 1
+    return rated
+
+
+def propose_tiers(rated, sizes=None):
+    """
+    Cut a rate_field() ranking into consecutive tiers of `sizes` players
+    (tier 1 first). Players past the last tier get tier_number NA.
+    """
+    sizes = DEFAULT_TIER_SIZES if sizes is None else sizes
+
+    bounds = pd.Series(sizes, dtype="int64").clip(lower=0).cumsum()
+    position = pd.Series(range(len(rated)), index=rated.index)
+    tier = bounds.searchsorted(position, side="right") + 1
+
+    proposal = rated.copy()
+    proposal["tier_number"] = pd.Series(tier, index=rated.index).where(tier <= len(sizes)).astype("Int64")
+    return proposal